@@ -5,89 +5,76 @@
 # with 3-bit S-box [7, 4, 6, 1, 0, 5, 2, 3]
 # =============================================
 
+import numpy as np
+
 ROUND_CONSTANT = 0x9e377900
+MASK32 = 0xffffffff
+# Round constants of the 24-round schedule (only rounds r % 4 == 0 have one)
+ROUND_XOR = {r: ROUND_CONSTANT ^ r for r in range(25) if r % 4 == 0}
 
 def rotl32(x, n):
-    return ((x << n) | (x >> (32 - n))) & 0xffffffff
+    return ((x << n) | (x >> (32 - n))) & MASK32
 
 def rotr32(x, n):
-    return ((x >> n) | (x << (32 - n))) & 0xffffffff
+    return ((x >> n) | (x << (32 - n))) & MASK32
 
 # ---------------------------
 # 3-bit S-box and its inverse
 # ---------------------------
-SBOX = [7, 4, 6, 1, 0, 5, 2, 3]
-INV_SBOX = [SBOX.index(i) for i in range(8)]
+SBOX = (7, 4, 6, 1, 0, 5, 2, 3)
+INV_SBOX = (4, 3, 6, 7, 1, 5, 2, 0)
 
+# The state is one flat uint32 array laid out as [x0..x3, y0..y3, z0..z3]
+# (or a stack of them, shape (N, 12)); x, y, z are views into it and every
+# layer below updates them in place along the last axis.
 def sbox_lanes(x, y, z):
-    new_x, new_y, new_z = [], [], []
-    for xi, yi, zi in zip(x, y, z):
-        sx = sy = sz = 0
-        for bit in range(32):
-            a = (xi >> bit) & 1
-            b = (yi >> bit) & 1
-            c = (zi >> bit) & 1
-            val = SBOX[(a << 2) | (b << 1) | c]
-            sx |= ((val >> 2) & 1) << bit
-            sy |= ((val >> 1) & 1) << bit
-            sz |= (val & 1) << bit
-        new_x.append(sx)
-        new_y.append(sy)
-        new_z.append(sz)
-    return new_x, new_y, new_z
+    # Bitsliced SBOX: bit i of (x, y, z) is one 3-bit input (a, b, c),
+    # so a handful of word-wide Boolean ops evaluates every bit at once.
+    a, b, c = x.copy(), y.copy(), z.copy()
+    x[:] = ~((a & ~c) | (b & c))
+    y[:] = ~((a | c) ^ (a & b))
+    z[:] = ~((a | b) ^ c)
+    return x, y, z
 
 def inv_sbox_lanes(x, y, z):
-    new_x, new_y, new_z = [], [], []
-    for xi, yi, zi in zip(x, y, z):
-        sx = sy = sz = 0
-        for bit in range(32):
-            a = (xi >> bit) & 1
-            b = (yi >> bit) & 1
-            c = (zi >> bit) & 1
-            val = INV_SBOX[(a << 2) | (b << 1) | c]
-            sx |= ((val >> 2) & 1) << bit
-            sy |= ((val >> 1) & 1) << bit
-            sz |= (val & 1) << bit
-        new_x.append(sx)
-        new_y.append(sy)
-        new_z.append(sz)
-    return new_x, new_y, new_z
+    # Bitsliced INV_SBOX, same lane layout as sbox_lanes.
+    a, b, c = x.copy(), y.copy(), z.copy()
+    x[:] = ~(a ^ (c & ~b))
+    y[:] = (b | c) ^ (a & c)
+    z[:] = (a | c) ^ (a & b)
+    return x, y, z
 
 # ---------------------------
 # Rotations and swaps (Corrected)
 # ---------------------------
+# uint32 arrays wrap on shift, so no MASK32 is needed here
 def rotate_planes(x, y, z):
-    return ([rotl32(w, 24) for w in x],
-            [rotl32(w, 9)  for w in y],
-            z)
+    x[:] = (x << 24) | (x >> 8)
+    y[:] = (y << 9) | (y >> 23)
+    return x, y, z
 
 def inv_rotate_planes(x, y, z):
-    return ([rotr32(w, 24) for w in x],
-            [rotr32(w, 9)  for w in y],
-            z)
+    x[:] = (x >> 24) | (x << 8)
+    y[:] = (y >> 9) | (y << 23)
+    return x, y, z
 
 def small_swap(x, y, z):
-    x[0], x[1] = x[1], x[0]
-    x[2], x[3] = x[3], x[2]
-    y[0], y[1] = y[1], y[0]
-    y[2], y[3] = y[3], y[2]
-    z[0], z[1] = z[1], z[0]
-    z[2], z[3] = z[3], z[2]
+    x[...] = x[..., [1, 0, 3, 2]]
+    y[...] = y[..., [1, 0, 3, 2]]
+    z[...] = z[..., [1, 0, 3, 2]]
     return x, y, z
 
 def big_swap(x, y, z):
-    x[0], x[2] = x[2], x[0]
-    x[1], x[3] = x[3], x[1]
-    y[0], y[2] = y[2], y[0]
-    y[1], y[3] = y[3], y[1]
-    z[0], z[2] = z[2], z[0]
-    z[1], z[3] = z[3], z[1]
+    x[...] = x[..., [2, 3, 0, 1]]
+    y[...] = y[..., [2, 3, 0, 1]]
+    z[...] = z[..., [2, 3, 0, 1]]
     return x, y, z
 
 def add_round_constant(x, round_number):
-    x = x[:]
-    if round_number % 4 == 0:
-        x[0] ^= (ROUND_CONSTANT ^ round_number)
+    if round_number in ROUND_XOR:
+        x[..., 0] ^= ROUND_XOR[round_number]
+    elif round_number % 4 == 0:
+        x[..., 0] ^= ROUND_CONSTANT ^ round_number
     return x
 
 def remove_round_constant(x, round_number):
@@ -99,19 +86,26 @@ def remove_round_constant(x, round_number):
 # ---------------------------
 def print_state(x, y, z, label="State"):
     print(f"\n{label} (3×4 bitwise matrix):")
-    print("x:", " ".join(format(w, "032b") for w in x))
-    print("y:", " ".join(format(w, "032b") for w in y))
-    print("z:", " ".join(format(w, "032b") for w in z))
+    print("x:", " ".join(f"{w:032b}" for w in x))
+    print("y:", " ".join(f"{w:032b}" for w in y))
+    print("z:", " ".join(f"{w:032b}" for w in z))
 
 # ---------------------------
 # Encryption
 # ---------------------------
-def gimli_encrypt(state, num_rounds=24):
+def gimli_encrypt(state, num_rounds=24, verbose=False):
+    st = np.array(state, dtype=np.uint32).reshape(12)
+    permute_flat(st, num_rounds, verbose)
+    return st[0:4].tolist(), st[4:8].tolist(), st[8:12].tolist()
+
+def permute_flat(st, num_rounds=24, verbose=False):
+    """Runs rounds 24, 23, ... in place on a flat (..., 12) uint32 state."""
     rounds = [24 - i for i in range(num_rounds)]
-    x, y, z = state
+    x, y, z = st[..., 0:4], st[..., 4:8], st[..., 8:12]
     
     for r in rounds:
-        print(f"\n--- Round {r} ---")
+        if verbose:
+            print(f"\n--- Round {r} ---")
         x, y, z = rotate_planes(x, y, z)
         x, y, z = sbox_lanes(x, y, z)
         if r % 4 == 0:
@@ -119,16 +113,18 @@ def gimli_encrypt(state, num_rounds=24):
         elif r % 4 == 2:
             x, y, z = big_swap(x, y, z)
         x = add_round_constant(x, r)
-        print_state(x, y, z, label=f"State after round {r}")
+        if verbose:
+            print_state(x, y, z, label=f"State after round {r}")
         
-    return x, y, z
+    return st
 
 # ---------------------------
 # Decryption (inverse)
 # ---------------------------
 def gimli_decrypt(state, num_rounds=2):
     rounds = [24 - i for i in range(num_rounds)]
-    x, y, z = state
+    st = np.array(state, dtype=np.uint32).reshape(12)
+    x, y, z = st[0:4], st[4:8], st[8:12]
 
     for r in reversed(rounds):
         x = remove_round_constant(x, r)
@@ -139,7 +135,7 @@ def gimli_decrypt(state, num_rounds=2):
         x, y, z = inv_sbox_lanes(x, y, z)
         x, y, z = inv_rotate_planes(x, y, z)
 
-    return x, y, z
+    return x.tolist(), y.tolist(), z.tolist()
 
 # ---------------------------
 # Differential Analysis
@@ -160,13 +156,12 @@ def run_differential_analysis():
         [0x00000000, 0x00000000, 0x00000000, 0x00000000]
     )
 
-    # Run for 3 rounds (24, 23, 22)
-    enc_state1_22 = gimli_encrypt(state1, num_rounds=3)
-    enc_state2_22 = gimli_encrypt(state2, num_rounds=3)
+    # Run both states for 3 rounds (24, 23, 22) in one stacked pass
+    pair = np.array([state1, state2], dtype=np.uint32).reshape(2, 12)
+    permute_flat(pair, num_rounds=3)
 
     # Calculate and print the difference trail
-    diff_22 = [s1 ^ s2 for s1, s2 in zip(enc_state1_22[0] + enc_state1_22[1] + enc_state1_22[2], 
-                                        enc_state2_22[0] + enc_state2_22[1] + enc_state2_22[2])]
+    diff_22 = (pair[0] ^ pair[1]).tolist()
     print("Difference after round 22:")
     print_state(diff_22[0:4], diff_22[4:8], diff_22[8:12])
 
@@ -183,21 +178,15 @@ def run_differential_analysis():
     # Run until round 20
     state_at_20 = gimli_encrypt(base_state, num_rounds=4)
 
-    # Introduce a difference
-    state_at_20_1 = state_at_20
-    state_at_20_2 = (
-        [state_at_20[0][0] ^ 0x1, state_at_20[0][1], state_at_20[0][2], state_at_20[0][3]],
-        state_at_20[1],
-        state_at_20[2]
-    )
+    # Introduce a difference: row 1 gets x[0] ^ 1
+    pair = np.array([state_at_20, state_at_20], dtype=np.uint32).reshape(2, 12)
+    pair[1, 0] ^= 0x1
 
     # Run from round 20 to 22 (3 rounds)
-    enc_state1_20_22 = gimli_encrypt(state_at_20_1, num_rounds=3)
-    enc_state2_20_22 = gimli_encrypt(state_at_20_2, num_rounds=3)
+    permute_flat(pair, num_rounds=3)
 
     # Calculate and print the difference trail
-    diff_20_22 = [s1 ^ s2 for s1, s2 in zip(enc_state1_20_22[0] + enc_state1_20_22[1] + enc_state1_20_22[2],
-                                             enc_state2_20_22[0] + enc_state2_20_22[1] + enc_state2_20_22[2])]
+    diff_20_22 = (pair[0] ^ pair[1]).tolist()
     print("Difference after round 22 (starting from 20):")
     print_state(diff_20_22[0:4], diff_20_22[4:8], diff_20_22[8:12])
 
@@ -9,7 +9,11 @@ IMPORTANT:
 """
 
 import os
-from Gimli_toy import gimli_encrypt   # <-- imports your toy permutation
+import sys
+from itertools import product
+import numpy as np
+from numba import njit
+from Gimli_toy import ROUND_CONSTANT, gimli_encrypt   # <-- imports your toy permutation
 
 
 # ==========================================================
@@ -33,6 +37,10 @@ def bytes_to_state(b):
     return (x, y, z)
 
 
+# round schedules R, R-1, ..., 1 for the usual round counts, built once
+# instead of on every hash call; other counts are built on demand
+_RS = {r: tuple(range(r, 0, -1)) for r in range(1, 25)}
+
 def toy_gimli_hash(msg: bytes, rounds=2) -> int:
     """
     EDUCATIONAL tiny Gimli hash:
@@ -44,37 +52,122 @@ def toy_gimli_hash(msg: bytes, rounds=2) -> int:
     state = bytes_to_state(msg)
 
     # run reduced permutation (R rounds)
-    enc = gimli_encrypt(state, rounds=tuple(range(rounds, 0, -1)))
+    enc = gimli_encrypt(state, rounds=_RS.get(rounds) or tuple(range(rounds, 0, -1)))
 
     # squeeze: output 1 byte from x-plane column 0
     x, y, z = enc
     return x[0] & 0xFF
 
 
+@njit(cache=True)
+def permute_hash(state, rounds):
+    """
+    Compiled R-round toy permutation on a uint8[3, 4] state (in place),
+    returning the squeezed byte x[0]. Mirrors Gimli_toy.gimli_encrypt.
+    """
+    for r in range(rounds, 0, -1):
+        for col in range(4):
+            a = ((state[0, col] << 6) | (state[0, col] >> 2)) & 0xFF
+            b = ((state[1, col] << 2) | (state[1, col] >> 6)) & 0xFF
+            c = state[2, col]
+            state[0, col] = ~((a & ~c) | (b & c)) & 0xFF
+            state[1, col] = ~((a | c) ^ (a & b)) & 0xFF
+            state[2, col] = ~((a | b) ^ c) & 0xFF
+        if r % 4 == 0:
+            for p in range(3):
+                t = state[p, 0]; state[p, 0] = state[p, 1]; state[p, 1] = t
+                t = state[p, 2]; state[p, 2] = state[p, 3]; state[p, 3] = t
+            state[0, 0] ^= ROUND_CONSTANT ^ r
+        elif r % 4 == 2:
+            for p in range(3):
+                t = state[p, 0]; state[p, 0] = state[p, 2]; state[p, 2] = t
+                t = state[p, 1]; state[p, 1] = state[p, 3]; state[p, 3] = t
+    return state[0, 0]
+
+
+@njit(cache=True)
+def toy_gimli_hash_batch(blocks, rounds=2):
+    """
+    Batched toy_gimli_hash over an (N, 3) uint8 array of messages,
+    zero-padded past each message's length (padding absorbs nothing).
+    Returns the N hash bytes as a uint8 array.
+    """
+    out = np.empty(blocks.shape[0], dtype=np.uint8)
+    state = np.zeros((3, 4), dtype=np.uint8)
+    for i in range(blocks.shape[0]):
+        state[:, :] = 0
+        state[0, 0] = blocks[i, 0]
+        state[1, 0] = blocks[i, 1]
+        state[2, 0] = blocks[i, 2]
+        out[i] = permute_hash(state, rounds)
+    return out
+
+
+# compile once at import rather than inside the first search
+toy_gimli_hash_batch(np.zeros((1, 3), dtype=np.uint8), 2)
+
+
 # ==========================================================
 #  Collision search (birthday style)
 # ==========================================================
 
+BATCH_SIZE = 1024
+
+def random_messages(count):
+    """
+    Draw `count` random short messages (1–3 bytes) from a single
+    os.urandom buffer of 4 bytes per message: byte 0 sets the length L,
+    bytes 1..L are the message. Returns (lengths, zero-padded (count, 3) blocks).
+    """
+    raw = np.frombuffer(os.urandom(4 * count), dtype=np.uint8).reshape(count, 4)
+    lengths = raw[:, 0] % 3 + 1
+    blocks = np.where(np.arange(3) < lengths[:, None], raw[:, 1:], 0)
+    return lengths, blocks
+
 def collision_search(rounds=2):
     """
     Random search for two messages m1 != m2
     such that toy_gimli_hash(m1) == toy_gimli_hash(m2).
+
+    Messages are drawn and hashed BATCH_SIZE at a time; the batch is then
+    scanned in order, so `attempts` counts exactly as a one-by-one search.
     """
-    seen = {}
+    seen = [None] * 256   # one slot per 1-byte hash value
     attempts = 0
 
     while True:
-        # pick a random short message (1–3 bytes)
-        L = os.urandom(1)[0] % 3 + 1
-        m = os.urandom(L)
+        lengths, blocks = random_messages(BATCH_SIZE)
+        hashes = toy_gimli_hash_batch(blocks, rounds)
+
+        for L, block, h in zip(lengths.tolist(), blocks.tolist(), hashes.tolist()):
+            m = bytes(block[:L])
+
+            if seen[h] is not None and seen[h] != m:
+                return seen[h], m, h, attempts
+
+            seen[h] = m
+            attempts += 1
+
+
+def collision_search_exhaustive(rounds=2):
+    """
+    Deterministic variant of collision_search: walk all messages of length
+    1, 2, 3 in order. With a 1-byte hash, a collision is guaranteed within
+    257 messages, so no randomness is needed and the loop always terminates.
+    """
+    seen = [None] * 256
+    attempts = 0
 
-        h = toy_gimli_hash(m, rounds)
+    for L in (1, 2, 3):
+        for block in product(range(256), repeat=L):
+            m = bytes(block)
+            h = toy_gimli_hash(m, rounds)
 
-        if h in seen and seen[h] != m:
-            return seen[h], m, h, attempts
+            if seen[h] is not None:
+                return seen[h], m, h, attempts
 
-        seen[h] = m
-        attempts += 1
+            seen[h] = m
+            attempts += 1
 
 
 # ==========================================================
@@ -82,7 +175,9 @@ def collision_search(rounds=2):
 # ==========================================================
 
 if __name__ == "__main__":
-    m1, m2, h, tries = collision_search(rounds=2)
+    # --exhaustive walks all messages in order instead of drawing random ones
+    search = collision_search_exhaustive if "--exhaustive" in sys.argv else collision_search
+    m1, m2, h, tries = search(rounds=2)
 
     print("======================================")
     print("EDUCATIONAL COLLISION FOUND")
@@ -3,6 +3,8 @@ This file contains the function to compute the Linear Approximation Table (LAT)
 for a given S-box, which is a core component in linear cryptanalysis.
 """
 
+from functools import lru_cache
+
 import numpy as np
 
 # -------------------------------------------------
@@ -10,23 +12,27 @@ import numpy as np
 # -------------------------------------------------
 def parity(n):
     """Computes the parity of an integer (1 if odd number of set bits, 0 otherwise)."""
-    return bin(n).count('1') % 2
+    return n.bit_count() & 1
 
 # -------------------------------------------------
 # Compute Linear Approximation Table (LAT)
 # -------------------------------------------------
+# Memoized per S-box tuple; the shared table is returned read-only.
+@lru_cache(maxsize=None)
+def _compute_lat_bias_cached(sbox):
+    n = len(sbox)
+    x = np.arange(n)
+    masks = np.arange(n)[:, None]
+    par_u = np.bitwise_count(masks & x) & 1                # par_u[u, x] = parity(u & x)
+    par_v = np.bitwise_count(masks & np.asarray(sbox)) & 1  # par_v[v, x] = parity(v & S[x])
+    matches = (par_u[:, None, :] == par_v[None, :, :]).sum(axis=-1)
+    table = (matches - n // 2).astype(int)
+    table.flags.writeable = False
+    return table
+
 def compute_lat_bias(sbox):
     """
     Computes the LAT bias table for a given S-box.
     The values are LAT[u,v] - N/2, where N is the size of the S-box.
     """
-    n = len(sbox)
-    lat_bias = np.zeros((n, n), dtype=int)
-    for u in range(n):  # Input mask
-        for v in range(n):  # Output mask
-            count = 0
-            for x in range(n):
-                if parity(u & x) == parity(v & sbox[x]):
-                    count += 1
-            lat_bias[u][v] = count - n // 2
-    return lat_bias
+    return _compute_lat_bias_cached(tuple(sbox))
@@ -5,44 +5,69 @@ on a 3-bit S-box by first computing the DDT and BCT to find optimal trails,
 and then constructing a valid boomerang quartet.
 """
 
+import sys
+from functools import lru_cache
+
 import numpy as np
+from numba import njit
 
 # -------------------------------------------------
 # Define nonlinear reversible 3-bit S-box and its inverse
 # -------------------------------------------------
-SBOX = [7, 4, 6, 1, 0, 5, 2, 3]
-SBOX_INV = [SBOX.index(i) for i in range(len(SBOX))]
+SBOX = bytes([7, 4, 6, 1, 0, 5, 2, 3])
+SBOX_INV = bytes(sorted(range(len(SBOX)), key=SBOX.__getitem__))
 N = len(SBOX)
+SBOX_ARRAY = np.frombuffer(SBOX, dtype=np.uint8)
 
 # -------------------------------------------------
 # Compute Difference Distribution Table (DDT)
 # -------------------------------------------------
-def compute_ddt(sbox):
-    """Computes the DDT for a given S-box."""
+# Tables depend only on the S-box, so they are memoized per S-box tuple and
+# returned read-only (every caller shares the same array).
+@lru_cache(maxsize=None)
+def _compute_ddt_cached(sbox):
     n = len(sbox)
-    ddt = np.zeros((n, n), dtype=int)
-    for a in range(n):
-        for x in range(n):
-            dy = sbox[x] ^ sbox[x ^ a]
-            ddt[a][dy] += 1
+    S = np.asarray(sbox)
+    x = np.arange(n)
+    a = x[:, None]
+    dy = S[x] ^ S[x ^ a]                # dy[a, x] = S[x] ^ S[x ^ a]
+    ddt = np.zeros((n, n), dtype=np.int32)
+    np.add.at(ddt, (np.broadcast_to(a, dy.shape), dy), 1)
+    ddt.flags.writeable = False
     return ddt
 
+def compute_ddt(sbox):
+    """Computes the DDT for a given S-box."""
+    return _compute_ddt_cached(tuple(sbox))
+
 # -------------------------------------------------
 # Compute Boomerang Connectivity Table (BCT)
 # -------------------------------------------------
-def compute_bct(sbox, sbox_inv):
-    """Computes the BCT for a given S-box and its inverse."""
-    n = len(sbox)
-    bct = np.zeros((n, n), dtype=int)
+@njit(cache=True)
+def bct_kernel(sbox, sbox_inv):
+    """Compiled BCT triple loop over int64 S-box arrays; O(n^2) memory."""
+    n = sbox.shape[0]
+    bct = np.zeros((n, n), np.int32)
     for a in range(n):
         for b in range(n):
             for x in range(n):
                 lhs = sbox_inv[sbox[x] ^ b]
                 rhs = sbox_inv[sbox[x ^ a] ^ b]
                 if (lhs ^ rhs) == a:
-                    bct[a][b] += 1
+                    bct[a, b] += 1
     return bct
 
+# Memoized like the DDT.
+@lru_cache(maxsize=None)
+def _compute_bct_cached(sbox, sbox_inv):
+    table = bct_kernel(np.asarray(sbox, dtype=np.int64), np.asarray(sbox_inv, dtype=np.int64))
+    table.flags.writeable = False
+    return table
+
+def compute_bct(sbox, sbox_inv):
+    """Computes the BCT for a given S-box and its inverse."""
+    return _compute_bct_cached(tuple(sbox), tuple(sbox_inv))
+
 # -------------------------------------------------
 # Find optimal trails from DDT and BCT
 # -------------------------------------------------
@@ -51,26 +76,19 @@ def find_optimal_trails(ddt, bct):
     Finds a high-probability trail (alpha -> beta) from the DDT and a
     compatible high-probability intermediate difference (gamma) from the BCT.
     """
-    # Find the best (alpha, beta) trail from DDT (highest probability, non-trivial)
-    best_p = 0
-    alpha, beta = 0, 0
-    # Start from 1 to ignore the trivial alpha=0 case
-    for a in range(1, N):
-        for b_ in range(N):
-            # Probability is count / N
-            if ddt[a][b_] > best_p:
-                best_p = ddt[a][b_]
-                alpha, beta = a, b_
-
-    # Find the best gamma for the chosen alpha from BCT
-    best_q = 0
-    gamma = 0
-    # Start from 1 to ignore the trivial gamma=0 case
-    for g in range(1, N):
-        if bct[alpha][g] > best_q:
-            best_q = bct[alpha][g]
-            gamma = g
-            
+    # Find the best (alpha, beta) trail from DDT (highest probability, non-trivial).
+    # Mask the trivial alpha=0 row; argmax keeps the first maximum, like a row-major scan.
+    masked = ddt.copy()
+    masked[0, :] = -1
+    alpha, beta = divmod(int(masked.argmax()), N)
+    best_p = ddt[alpha, beta]
+
+    # Find the best gamma for the chosen alpha from BCT, ignoring trivial gamma=0
+    row = bct[alpha].copy()
+    row[0] = -1
+    gamma = int(row.argmax())
+    best_q = bct[alpha, gamma]
+
     p = best_p / N
     q = best_q / N
 
@@ -81,10 +99,16 @@ def find_optimal_trails(ddt, bct):
 # -------------------------------------------------
 def find_plaintext_for_trail(alpha, beta):
     """Finds a plaintext P that satisfies SBOX(P) ^ SBOX(P^alpha) = beta."""
-    for p_candidate in range(N):
-        if (SBOX[p_candidate] ^ SBOX[p_candidate ^ alpha]) == beta:
-            return p_candidate
-    return None # Should not happen if the trail exists in DDT
+    x = np.arange(N)
+    hits = np.flatnonzero((SBOX_ARRAY ^ SBOX_ARRAY[x ^ alpha]) == beta)
+    return int(hits[0]) if hits.size else None # None should not happen if the trail exists in DDT
+
+# -------------------------------------------------
+# Buffered demo output
+# -------------------------------------------------
+def flush_output(out):
+    """Writes the collected demo lines to stdout in one call."""
+    sys.stdout.write("\n".join(out) + "\n")
 
 # -------------------------------------------------
 # Main boomerang demonstration
@@ -93,74 +117,79 @@ def demonstrate_boomerang():
     """
     Computes tables, finds trails, and demonstrates the boomerang attack.
     """
-    print("--- Boomerang Attack Demonstration on S-box ---")
+    out = []
+    out.append("--- Boomerang Attack Demonstration on S-box ---")
     
     # 1. Compute tables
     ddt = compute_ddt(SBOX)
     bct = compute_bct(SBOX, SBOX_INV)
-    print("\nComputed DDT:\n", ddt)
-    print("\nComputed BCT:\n", bct)
+    out.append(f"\nComputed DDT:\n {ddt}")
+    out.append(f"\nComputed BCT:\n {bct}")
 
     # 2. Find optimal trails automatically
     alpha, beta, p, gamma, q = find_optimal_trails(ddt, bct)
-    print("\n--- Step 1: Automatically find high-probability trails ---")
-    print(f"Found E0 trail (p={p:.2f}) from DDT: α={alpha} -> β={beta} (DDT[{alpha},{beta}]={ddt[alpha,beta]})")
-    print(f"Found best intermediate diff for α={alpha} from BCT: γ={gamma} (BCT[{alpha},{gamma}]={bct[alpha,gamma]}, boomerang prob q={q:.2f})")
+    out.append("\n--- Step 1: Automatically find high-probability trails ---")
+    out.append(f"Found E0 trail (p={p:.2f}) from DDT: α={alpha} -> β={beta} (DDT[{alpha},{beta}]={int(ddt[alpha,beta])})")
+    out.append(f"Found best intermediate diff for α={alpha} from BCT: γ={gamma} (BCT[{alpha},{gamma}]={int(bct[alpha,gamma])}, boomerang prob q={q:.2f})")
 
     # 3. Find a plaintext P that satisfies the E0 trail.
     P = find_plaintext_for_trail(alpha, beta)
     if P is None:
-        print("Could not find a suitable plaintext. Exiting.")
+        out.append("Could not find a suitable plaintext. Exiting.")
+        flush_output(out)
         return
         
     P_prime = P ^ alpha
-    print("\n--- Step 2: Find a plaintext pair (P, P') that follows the E0 trail ---")
-    print(f"  Found P = {P} which satisfies SBOX({P}) ^ SBOX({P}^α) = β")
-    print(f"  P       = {P}  (binary {P:03b})")
-    print(f"  α       = {alpha}  (binary {alpha:03b})")
-    print(f"  P'      = P ^ α = {P_prime}  (binary {P_prime:03b})")
+    out.append("\n--- Step 2: Find a plaintext pair (P, P') that follows the E0 trail ---")
+    out.append(f"  Found P = {P} which satisfies SBOX({P}) ^ SBOX({P}^α) = β")
+    out.append(f"  P       = {P}  (binary {P:03b})")
+    out.append(f"  α       = {alpha}  (binary {alpha:03b})")
+    out.append(f"  P'      = P ^ α = {P_prime}  (binary {P_prime:03b})")
 
     # 4. "Encrypt" through E0 (the forward S-box)
     C = SBOX[P]
     C_prime = SBOX[P_prime]
-    print("\n--- Step 3: Encrypt through E0 (SBOX) ---")
-    print(f"  C       = SBOX(P) = {C}")
-    print(f"  C'      = SBOX(P') = {C_prime}")
+    out.append("\n--- Step 3: Encrypt through E0 (SBOX) ---")
+    out.append(f"  C       = SBOX(P) = {C}")
+    out.append(f"  C'      = SBOX(P') = {C_prime}")
 
     # 5. Verify that the intermediate difference is β
     intermediate_diff = C ^ C_prime
-    print(f"\n>>> Verifying intermediate difference:")
-    print(f"  C ^ C' = {C} ^ {C_prime} = {intermediate_diff}")
+    out.append(f"\n>>> Verifying intermediate difference:")
+    out.append(f"  C ^ C' = {C} ^ {C_prime} = {intermediate_diff}")
     if intermediate_diff == beta:
-        print(f"  This matches our expected intermediate difference β = {beta}. The first trail holds true.")
+        out.append(f"  This matches our expected intermediate difference β = {beta}. The first trail holds true.")
     else:
-        print(f"  This DOES NOT match β = {beta}. The demonstration has failed unexpectedly.")
+        out.append(f"  This DOES NOT match β = {beta}. The demonstration has failed unexpectedly.")
+        flush_output(out)
         return
 
     # 6. Create a second pair (D, D') with difference γ
     D = C ^ gamma
     D_prime = C_prime ^ gamma
-    print(f"\n--- Step 4: Create a new pair (D, D') with difference γ ---")
-    print(f"  D       = C ^ γ = {C} ^ {gamma} = {D}")
-    print(f"  D'      = C' ^ γ = {C_prime} ^ {gamma} = {D_prime}")
+    out.append(f"\n--- Step 4: Create a new pair (D, D') with difference γ ---")
+    out.append(f"  D       = C ^ γ = {C} ^ {gamma} = {D}")
+    out.append(f"  D'      = C' ^ γ = {C_prime} ^ {gamma} = {D_prime}")
 
     # 7. "Decrypt" this pair through E1_inv (the inverse S-box)
     X = SBOX_INV[D]
     X_prime = SBOX_INV[D_prime]
-    print(f"\n--- Step 5: Decrypt (D, D') through E1_inv (SBOX_INV) ---")
-    print(f"  X       = SBOX_INV(D) = {X}")
-    print(f"  X'      = SBOX_INV(D') = {X_prime}")
+    out.append(f"\n--- Step 5: Decrypt (D, D') through E1_inv (SBOX_INV) ---")
+    out.append(f"  X       = SBOX_INV(D) = {X}")
+    out.append(f"  X'      = SBOX_INV(D') = {X_prime}")
 
     # 8. Verify that the original difference α has returned
     final_diff = X ^ X_prime
-    print(f"\n>>> Step 6: Verifying the final boomerang property <<<")
-    print(f"  The final difference is X ^ X' = {X} ^ {X_prime} = {final_diff}")
+    out.append(f"\n>>> Step 6: Verifying the final boomerang property <<<")
+    out.append(f"  The final difference is X ^ X' = {X} ^ {X_prime} = {final_diff}")
     if final_diff == alpha:
-        print(f"  SUCCESS! The final difference matches the original difference α = {alpha}.")
-        print("  The boomerang has returned, forming the quartet (P, P', X, X').")
+        out.append(f"  SUCCESS! The final difference matches the original difference α = {alpha}.")
+        out.append("  The boomerang has returned, forming the quartet (P, P', X, X').")
     else:
-        print(f"  FAILURE! The boomerang failed. The final difference does not match α.")
-        print("  This can happen even with good trails, as they are probabilistic.")
+        out.append(f"  FAILURE! The boomerang failed. The final difference does not match α.")
+        out.append("  This can happen even with good trails, as they are probabilistic.")
+    flush_output(out)
+
 
 if __name__ == "__main__":
     demonstrate_boomerang()
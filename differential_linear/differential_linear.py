@@ -6,35 +6,62 @@ The attack combines a differential characteristic over the first round (E0)
 and a linear approximation over the second round (E1).
 """
 
+import sys
+from functools import lru_cache
+
 import numpy as np
+from numba import njit, prange
 from LAT import compute_lat_bias
 
 # -------------------------------------------------
 # Define the 3-bit S-box from Gimli
 # -------------------------------------------------
-SBOX = [7, 4, 6, 1, 0, 5, 2, 3]
+SBOX = bytes([7, 4, 6, 1, 0, 5, 2, 3])
 N = len(SBOX)
+SBOX_ARRAY = np.frombuffer(SBOX, dtype=np.uint8)
+
+# PCG64 generator for the Monte-Carlo plaintexts
+_rng = np.random.default_rng()
+
+# N = 2**3, so each plaintext needs 3 random bits: 21 of them per 64-bit word
+SAMPLE_BITS = N.bit_length() - 1
+SAMPLES_PER_WORD = 64 // SAMPLE_BITS
+
+def random_words(count):
+    """Raw PRNG words holding `count` plaintexts as packed 3-bit lanes."""
+    words = -(-count // SAMPLES_PER_WORD)
+    return np.frombuffer(_rng.bytes(8 * words), dtype=np.uint64)
 
 # -------------------------------------------------
 # Helper function to compute parity
 # -------------------------------------------------
 def parity(n):
     """Computes the parity of an integer (1 if odd number of set bits, 0 otherwise)."""
-    return bin(n).count('1') % 2
+    return n.bit_count() & 1
+
+# parity of every value below N, for indexing with NumPy arrays
+PARITY = np.array([parity(v) for v in range(N)])
 
 # -------------------------------------------------
 # Compute Difference Distribution Table (DDT)
 # -------------------------------------------------
-def compute_ddt(sbox):
-    """Computes the DDT for a given S-box."""
+# Tables depend only on the S-box, so they are memoized per S-box tuple and
+# returned read-only (every caller shares the same array).
+@lru_cache(maxsize=None)
+def _compute_ddt_cached(sbox):
     n = len(sbox)
-    ddt = np.zeros((n, n), dtype=int)
-    for alpha in range(n):
-        for x in range(n):
-            beta = sbox[x] ^ sbox[x ^ alpha]
-            ddt[alpha][beta] += 1
+    S = np.asarray(sbox)
+    x = np.arange(n)
+    a = x[:, None]
+    dy = S[x] ^ S[x ^ a]                # dy[a, x] = S[x] ^ S[x ^ a]
+    ddt = np.zeros((n, n), dtype=np.int32)
+    np.add.at(ddt, (np.broadcast_to(a, dy.shape), dy), 1)
+    ddt.flags.writeable = False
     return ddt
 
+def compute_ddt(sbox):
+    """Computes the DDT for a given S-box."""
+    return _compute_ddt_cached(tuple(sbox))
 
 # -------------------------------------------------
 # Find the best differential-linear characteristic
@@ -44,38 +71,65 @@ def find_best_characteristic(ddt, lat_bias):
     Finds a list of the best characteristics (alpha, beta, delta) that 
     share the same maximum value of p * q^2.
     """
-    max_correlation_sq = -1.0
-    best_characteristics = []
     # Use a small tolerance for floating point comparisons
     tolerance = 1e-9
 
-    # Iterate through all non-trivial input differences
-    for alpha in range(1, N):
-        # Iterate through all non-trivial intermediate differences/masks
-        for beta in range(1, N):
-            # Probability 'p' of the differential trail (alpha -> beta)
-            p = ddt[alpha][beta] / N
-            if p == 0:
-                continue
-
-            # Iterate through all non-trivial output masks
-            for delta in range(1, N):
-                # Correlation 'q' of the linear trail (beta -> delta)
-                q = lat_bias[beta][delta] / (N / 2)
-                
-                # The effective squared correlation for the whole distinguisher
-                p_q_sq = p * (q ** 2)
-
-                if p_q_sq > max_correlation_sq + tolerance:
-                    # Found a new maximum, clear the old list
-                    max_correlation_sq = p_q_sq
-                    best_characteristics = [(alpha, beta, delta, p, q, p_q_sq)]
-                elif abs(p_q_sq - max_correlation_sq) < tolerance:
-                    # Found another characteristic with the same max value
-                    best_characteristics.append((alpha, beta, delta, p, q, p_q_sq))
-    
+    P = ddt / N              # P[alpha, beta]: differential probability
+    Q = lat_bias / (N / 2)   # Q[beta, delta]: linear correlation
+    M = P[:, :, None] * (Q[None, :, :] ** 2)
+
+    # Mask trivial alpha/beta/delta and impossible differentials
+    M[0, :, :] = -1
+    M[:, 0, :] = -1
+    M[:, :, 0] = -1
+    M[P == 0] = -1
+
+    best = np.argwhere(M > M.max() - tolerance)
+    best_characteristics = [
+        (int(alpha), int(beta), int(delta), P[alpha, beta], Q[beta, delta], M[alpha, beta, delta])
+        for alpha, beta, delta in best
+    ]
     return best_characteristics
 
+# -------------------------------------------------
+# Monte-Carlo kernel for the 2-round cipher
+# -------------------------------------------------
+# Our simple 2-round cipher: E0 and E1 are each one S-box lookup
+@njit(parallel=True, cache=True)
+def run_trials(words, num_pairs, alpha, beta, delta, sbox, par):
+    """
+    Runs the distinguisher on the pairs (P, P ^ alpha), P taken lane by lane
+    from the packed random words.
+    Returns (sum of (-1)^L, differential hits, sum of (-1)^L on hits, on misses).
+    """
+    sum_of_terms = 0
+    diff_hits_count = 0
+    sum_dl_given_diff_hit = 0
+    sum_dl_given_diff_miss = 0
+    for i in prange(num_pairs):
+        shift = np.uint64((i % SAMPLES_PER_WORD) * SAMPLE_BITS)
+        p_val = (words[i // SAMPLES_PER_WORD] >> shift) & np.uint64(N - 1)
+        y_val = sbox[p_val]
+        y_prime_val = sbox[p_val ^ np.uint64(alpha)]
+        c_val = sbox[y_val]
+        c_prime_val = sbox[y_prime_val]
+
+        term = 1 - 2 * (par[delta & c_val] ^ par[delta & c_prime_val])   # (-1)**L
+        sum_of_terms += term
+        if (y_val ^ y_prime_val) == beta:
+            diff_hits_count += 1
+            sum_dl_given_diff_hit += term
+        else:
+            sum_dl_given_diff_miss += term
+    return sum_of_terms, diff_hits_count, sum_dl_given_diff_hit, sum_dl_given_diff_miss
+
+# -------------------------------------------------
+# Buffered demo output
+# -------------------------------------------------
+def flush_output(out):
+    """Writes the collected demo lines to stdout in one call."""
+    sys.stdout.write("\n".join(out) + "\n")
+
 # -------------------------------------------------
 # Main Differential-Linear Attack Demonstration
 # -------------------------------------------------
@@ -83,87 +137,63 @@ def demonstrate_attack(num_pairs=200000):
     """
     Computes tables, finds the best characteristic(s), and runs the distinguisher for each.
     """
-    print("--- Differential-Linear Attack Demonstration on 2-Round S-box Cipher ---")
+    out = []
+    out.append("--- Differential-Linear Attack Demonstration on 2-Round S-box Cipher ---")
 
     # 1. Compute tables
     ddt = compute_ddt(SBOX)
     lat_bias = compute_lat_bias(SBOX)
-    print("\nComputed DDT:\n", ddt)
-    print("\nComputed LAT Bias (LAT[u,v] - 4):\n", lat_bias)
+    out.append(f"\nComputed DDT:\n {ddt}")
+    out.append(f"\nComputed LAT Bias (LAT[u,v] - 4):\n {lat_bias}")
 
     # 2. Find all optimal characteristics
     best_characteristics = find_best_characteristic(ddt, lat_bias)
-    print(f"\n--- Step 1: Found {len(best_characteristics)} best characteristic(s) with p*q^2 ≈ {best_characteristics[0][5]:.6f} ---")
-    
+    out.append(f"\n--- Step 1: Found {len(best_characteristics)} best characteristic(s) with p*q^2 ≈ {best_characteristics[0][5]:.6f} ---")
+
+    # The same random plaintexts are reused for every trail; only alpha,
+    # beta and delta change between simulations
+    words = random_words(num_pairs)
+
     for i, (alpha, beta, delta, p, q, p_q_sq) in enumerate(best_characteristics):
-        print(f"\n--- Testing Trail {i+1}/{len(best_characteristics)}: α={alpha}, β={beta}, δ={delta} ---")
+        out.append(f"\n--- Testing Trail {i+1}/{len(best_characteristics)}: α={alpha}, β={beta}, δ={delta} ---")
         
         # The sign of the correlation depends on the constant parity(gamma.beta). Here gamma=beta.
-        correlation_sign = (-1)**parity(beta & beta)
+        correlation_sign = 1 - 2 * parity(beta & beta)   # (-1)**parity
         theoretical_correlation = correlation_sign * p * (q**2)
 
-        # Define our simple 2-round cipher
-        def e0(p_val):
-            return SBOX[p_val]
-        def e1(c_val):
-            return SBOX[c_val]
-        def cipher(p_val):
-            return e1(e0(p_val))
-
-        print(f"--- Running simulation for Trail {i+1} ---")
-
-        # 3. Run the distinguisher in a single loop
-        sum_of_terms = 0
-        diff_hits_count = 0
-        sum_dl_given_diff_hit = 0
-        sum_dl_given_diff_miss = 0
-
-        for _ in range(num_pairs):
-            p_val = np.random.randint(0, N)
-            p_prime_val = p_val ^ alpha
-
-            y_val = e0(p_val)
-            y_prime_val = e0(p_prime_val)
-
-            c_val = e1(y_val)
-            c_prime_val = e1(y_prime_val)
-
-            linear_expr_val = parity(delta & c_val) ^ parity(delta & c_prime_val)
-            current_term = (-1)**linear_expr_val
-            sum_of_terms += current_term
+        out.append(f"--- Running simulation for Trail {i+1} ---")
 
-            if (y_val ^ y_prime_val) == beta:
-                diff_hits_count += 1
-                sum_dl_given_diff_hit += current_term
-            else:
-                sum_dl_given_diff_miss += current_term
+        # 3. Run the distinguisher on all pairs in one compiled pass
+        sum_of_terms, diff_hits_count, sum_dl_given_diff_hit, sum_dl_given_diff_miss = \
+            run_trials(words, num_pairs, alpha, beta, delta, SBOX_ARRAY, PARITY)
 
         # 4. Analyze results
         empirical_correlation = sum_of_terms / num_pairs
         stdev = np.sqrt(num_pairs)
 
-        print(f"\n--- Analysis for Trail {i+1} ---")
-        print(f"  Overall Empirical Correlation:   {empirical_correlation:.6f}")
-        print(f"  Overall Theoretical Correlation: {theoretical_correlation:.6f}")
+        out.append(f"\n--- Analysis for Trail {i+1} ---")
+        out.append(f"  Overall Empirical Correlation:   {empirical_correlation:.6f}")
+        out.append(f"  Overall Theoretical Correlation: {theoretical_correlation:.6f}")
 
-        print("\n  --- Intermediate Checks ---")
+        out.append("\n  --- Intermediate Checks ---")
         empirical_diff_prob = diff_hits_count / num_pairs
-        print(f"    Empirical Differential Probability (P -> Y): {empirical_diff_prob:.4f} (Expected: {p:.4f})")
+        out.append(f"    Empirical Differential Probability (P -> Y): {empirical_diff_prob:.4f} (Expected: {p:.4f})")
 
         if diff_hits_count > 0:
             empirical_cond_corr_hit = sum_dl_given_diff_hit / diff_hits_count
             expected_cond_corr_hit = correlation_sign * (q**2)
-            print(f"    Empirical Conditional Corr (L | diff holds): {empirical_cond_corr_hit:.6f} (Expected: {expected_cond_corr_hit:.6f})")
+            out.append(f"    Empirical Conditional Corr (L | diff holds): {empirical_cond_corr_hit:.6f} (Expected: {expected_cond_corr_hit:.6f})")
         
         diff_miss_count = num_pairs - diff_hits_count
         if diff_miss_count > 0:
             empirical_cond_corr_miss = sum_dl_given_diff_miss / diff_miss_count
-            print(f"    Empirical Conditional Corr (L | diff misses): {empirical_cond_corr_miss:.6f} (Expected: ~0.000000)")
+            out.append(f"    Empirical Conditional Corr (L | diff misses): {empirical_cond_corr_miss:.6f} (Expected: ~0.000000)")
 
         if abs(sum_of_terms) > 3 * stdev:
-            print(f"\n  SUCCESS: A significant correlation was detected ({abs(sum_of_terms)/stdev:.1f} std dev).")
+            out.append(f"\n  SUCCESS: A significant correlation was detected ({abs(sum_of_terms)/stdev:.1f} std dev).")
         else:
-            print(f"\n  FAILURE: Overall correlation not significant ({abs(sum_of_terms)/stdev:.1f} std dev).")
+            out.append(f"\n  FAILURE: Overall correlation not significant ({abs(sum_of_terms)/stdev:.1f} std dev).")
+    flush_output(out)
 
 
 if __name__ == "__main__":
@@ -1,4 +1,6 @@
-import matplotlib.pyplot as plt
+import os
+import sys
+
 import numpy as np
 
 # -------------------------------------------------
@@ -17,7 +19,7 @@ for i, v in enumerate(sbox):
 # -------------------------------------------------
 def compute_ddt(sbox):
     n = len(sbox)
-    ddt = np.zeros((n, n), dtype=int)
+    ddt = np.zeros((n, n), dtype=np.int32)
     for a in range(n):
         for x in range(n):
             dy = sbox[x] ^ sbox[x ^ a]
@@ -29,20 +31,27 @@ def compute_ddt(sbox):
 # -------------------------------------------------
 def compute_bct(sbox, sbox_inv):
     n = len(sbox)
-    bct = np.zeros((n, n), dtype=int)
-    for a in range(n):
-        for b in range(n):
-            for x in range(n):
-                lhs = sbox_inv[sbox[x] ^ b]
-                rhs = sbox_inv[sbox[x ^ a] ^ b]
-                if (lhs ^ rhs) == a:
-                    bct[a][b] += 1
-    return bct
+    S = np.asarray(sbox)
+    S_inv = np.asarray(sbox_inv)
+    x = np.arange(n)[None, None, :]
+    a = np.arange(n)[:, None, None]
+    b = np.arange(n)[None, :, None]
+    lhs = S_inv[S[x] ^ b]           # (1, n, n): indexed [_, b, x]
+    rhs = S_inv[S[x ^ a] ^ b]       # (n, n, n): indexed [a, b, x]
+    return ((lhs ^ rhs) == a).sum(axis=2).astype(np.int32)
 
 # -------------------------------------------------
 # Visualization helper
 # -------------------------------------------------
-def plot_table(table, title):
+def plot_table(table, title, filename):
+    # matplotlib is only imported when plotting was asked for (--plot);
+    # without a display it renders off-screen to `filename` instead.
+    import matplotlib
+    headless = sys.platform.startswith("linux") and not os.environ.get("DISPLAY")
+    if headless:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(6, 5))
     plt.imshow(table, cmap='viridis', interpolation='nearest')
     plt.colorbar(label='Count')
@@ -52,19 +61,25 @@ def plot_table(table, title):
     for i in range(n):
         for j in range(n):
             plt.text(j, i, f"{table[i,j]}", ha='center', va='center', color='white', fontsize=10)
-    plt.show()
+    if headless:
+        plt.savefig(filename)
+        plt.close()
+        print(f"Saved {filename}")
+    else:
+        plt.show()
 
 # -------------------------------------------------
-# Compute & plot both tables
+# Compute & plot both tables (plots only with --plot)
 # -------------------------------------------------
-ddt = compute_ddt(sbox)
-bct = compute_bct(sbox, sbox_inv)
-
-print("S-box:", sbox)
-print("Inverse:", sbox_inv)
-print("\nDDT:\n", ddt)
-print("\nBCT:\n", bct)
+if __name__ == "__main__":
+    ddt = compute_ddt(sbox)
+    bct = compute_bct(sbox, sbox_inv)
 
-plot_table(ddt, "Difference Distribution Table (DDT)")
-plot_table(bct, "Boomerang Connectivity Table (BCT)")
+    print("S-box:", sbox)
+    print("Inverse:", sbox_inv)
+    print("\nDDT:\n", ddt)
+    print("\nBCT:\n", bct)
 
+    if "--plot" in sys.argv:
+        plot_table(ddt, "Difference Distribution Table (DDT)", "ddt.png")
+        plot_table(bct, "Boomerang Connectivity Table (BCT)", "bct.png")
@@ -4,8 +4,7 @@ This script provides a concrete demonstration of the boomerang attack
 properties on the 3-bit S-box used in the toy Gimli cipher.
 '''
 
-SBOX = [7, 4, 6, 1, 0, 5, 2, 3]
-INV_SBOX = [SBOX.index(i) for i in range(len(SBOX))]
+from common_sbox import SBOX, INV_SBOX
 
 def demonstrate_boomerang():
     """
@@ -0,0 +1,7 @@
+'''
+The 3-bit S-box [7, 4, 6, 1, 0, 5, 2, 3] shared by the toy Gimli scripts,
+together with its inverse.
+'''
+
+SBOX = (7, 4, 6, 1, 0, 5, 2, 3)
+INV_SBOX = (4, 3, 6, 7, 1, 5, 2, 0)
@@ -1,7 +1,9 @@
 
-import random
+import numpy as np
 
-SBOX = [7, 4, 6, 1, 0, 5, 2, 3]
+from common_sbox import SBOX
+
+SBOX_ARRAY = np.asarray(SBOX, dtype=np.uint8)
 
 def calculate_actual_theoretical_prob():
     """
@@ -11,20 +13,20 @@ def calculate_actual_theoretical_prob():
     """
     alpha = 1
     gamma = 1
-    sbox_size = 8
-    count = 0
-    for p in range(sbox_size):
-        for r in range(sbox_size):
-            cond1 = (SBOX[p] ^ SBOX[r]) == gamma
-            cond2 = (SBOX[p ^ alpha] ^ SBOX[r ^ alpha]) == gamma
-            if cond1 and cond2:
-                count += 1
+    sbox_size = len(SBOX)
+    # All (P, R) pairs at once: rows are P, columns are R
+    p = np.arange(sbox_size)[:, None]
+    r = np.arange(sbox_size)[None, :]
+    cond1 = (SBOX_ARRAY[p] ^ SBOX_ARRAY[r]) == gamma
+    cond2 = (SBOX_ARRAY[p ^ alpha] ^ SBOX_ARRAY[r ^ alpha]) == gamma
+    count = int((cond1 & cond2).sum())
     # The total number of (P, R) pairs is sbox_size * sbox_size
     return count / (sbox_size * sbox_size), count
 
-def estimate_boomerang_probability(num_trials=10000):
+def estimate_boomerang_probability(num_trials=10000, seed=None):
     """
     Runs a large number of trials to estimate the boomerang probability.
+    Pass `seed` to make the run reproducible.
     """
     print(f"--- Estimating Boomerang Probability over {num_trials} trials ---")
 
@@ -36,22 +38,18 @@ def estimate_boomerang_probability(num_trials=10000):
     print(f"Correct theoretical probability for this specific experiment: {theoretical_prob:.6f} (or {success_pairs} in 64, which is 1 in {1/theoretical_prob})")
     print("(Note: This is different from the p²*q² probability of the full boomerang distinguisher, which is ~1/256)")
 
-    success_count = 0
-    
     print(f"\nRunning {num_trials} trials...")
 
-    for i in range(num_trials):
-        P = random.randint(0, 7)
-        R = random.randint(0, 7)
+    rng = np.random.default_rng(seed)
+    P = rng.integers(0, len(SBOX), size=num_trials, dtype=np.uint8)
+    R = rng.integers(0, len(SBOX), size=num_trials, dtype=np.uint8)
 
-        P_prime = P ^ alpha
-        R_prime = R ^ alpha
+    P_prime = P ^ alpha
+    R_prime = R ^ alpha
 
-        condition1 = (SBOX[P] ^ SBOX[R]) == gamma
-        condition2 = (SBOX[P_prime] ^ SBOX[R_prime]) == gamma
-        
-        if condition1 and condition2:
-            success_count += 1
+    condition1 = (SBOX_ARRAY[P] ^ SBOX_ARRAY[R]) == gamma
+    condition2 = (SBOX_ARRAY[P_prime] ^ SBOX_ARRAY[R_prime]) == gamma
+    success_count = int((condition1 & condition2).sum())
 
     print(f"\nSimulation finished.")
     print(f"Found {success_count} successes in {num_trials} trials.")
@@ -6,51 +6,36 @@
 # =============================================
 
 ROUND_CONSTANT = 0x9e377900
+MASK32 = 0xffffffff
+# Round constants of the 24-round schedule (only rounds r % 4 == 0 have one)
+ROUND_XOR = {r: ROUND_CONSTANT ^ r for r in range(25) if r % 4 == 0}
 
 def rotl32(x, n):
-    return ((x << n) | (x >> (32 - n))) & 0xffffffff
+    return ((x << n) | (x >> (32 - n))) & MASK32
 
 def rotr32(x, n):
-    return ((x >> n) | (x << (32 - n))) & 0xffffffff
+    return ((x >> n) | (x << (32 - n))) & MASK32
 
 # ---------------------------
 # 3-bit S-box and its inverse
 # ---------------------------
-SBOX = [7, 4, 6, 1, 0, 5, 2, 3]
-INV_SBOX = [SBOX.index(i) for i in range(8)]
-
 def sbox_lanes(x, y, z):
+    # Bitsliced SBOX: bit i of (x, y, z) is one 3-bit input (a, b, c),
+    # so a handful of word-wide Boolean ops evaluates every bit at once.
     new_x, new_y, new_z = [], [], []
-    for xi, yi, zi in zip(x, y, z):
-        sx = sy = sz = 0
-        for bit in range(32):
-            a = (xi >> bit) & 1
-            b = (yi >> bit) & 1
-            c = (zi >> bit) & 1
-            val = SBOX[(a << 2) | (b << 1) | c]
-            sx |= ((val >> 2) & 1) << bit
-            sy |= ((val >> 1) & 1) << bit
-            sz |= (val & 1) << bit
-        new_x.append(sx)
-        new_y.append(sy)
-        new_z.append(sz)
+    for a, b, c in zip(x, y, z):
+        new_x.append(((a & ~c) | (b & c)) ^ MASK32)
+        new_y.append(((a | c) ^ (a & b)) ^ MASK32)
+        new_z.append(((a | b) ^ c) ^ MASK32)
     return new_x, new_y, new_z
 
 def inv_sbox_lanes(x, y, z):
+    # Bitsliced INV_SBOX, same lane layout as sbox_lanes.
     new_x, new_y, new_z = [], [], []
-    for xi, yi, zi in zip(x, y, z):
-        sx = sy = sz = 0
-        for bit in range(32):
-            a = (xi >> bit) & 1
-            b = (yi >> bit) & 1
-            c = (zi >> bit) & 1
-            val = INV_SBOX[(a << 2) | (b << 1) | c]
-            sx |= ((val >> 2) & 1) << bit
-            sy |= ((val >> 1) & 1) << bit
-            sz |= (val & 1) << bit
-        new_x.append(sx)
-        new_y.append(sy)
-        new_z.append(sz)
+    for a, b, c in zip(x, y, z):
+        new_x.append((a ^ (c & ~b)) ^ MASK32)
+        new_y.append((b | c) ^ (a & c))
+        new_z.append((a | c) ^ (a & b))
     return new_x, new_y, new_z
 
 # ---------------------------
@@ -85,9 +70,11 @@ def big_swap(x, y, z):
     return x, y, z
 
 def add_round_constant(x, round_number):
-    x = x[:]
-    if round_number % 4 == 0:
-        x[0] ^= (ROUND_CONSTANT ^ round_number)
+    # In place: callers always hand in a plane they own.
+    if round_number in ROUND_XOR:
+        x[0] ^= ROUND_XOR[round_number]
+    elif round_number % 4 == 0:
+        x[0] ^= ROUND_CONSTANT ^ round_number
     return x
 
 def remove_round_constant(x, round_number):
@@ -99,72 +86,90 @@ def remove_round_constant(x, round_number):
 # ---------------------------
 def print_state(x, y, z, label="State"):
     print(f"\n{label} (3×4 bitwise matrix):")
-    print("x:", " ".join(format(w, "032b") for w in x))
-    print("y:", " ".join(format(w, "032b") for w in y))
-    print("z:", " ".join(format(w, "032b") for w in z))
+    print("x:", " ".join(f"{w:032b}" for w in x))
+    print("y:", " ".join(f"{w:032b}" for w in y))
+    print("z:", " ".join(f"{w:032b}" for w in z))
 
 # ---------------------------
 # Encryption
 # ---------------------------
-def gimli_encrypt(state, num_rounds=2):
+def gimli_encrypt(state, num_rounds=2, verbose=False):
     rounds = [24 - i for i in range(num_rounds)]
     x, y, z = state
-    print_state(x, y, z, "Initial state")
+    if verbose:
+        print_state(x, y, z, "Initial state")
 
     for r in rounds:
-        print(f"\n=== Round {r} (Encryption) ===")
+        if verbose:
+            print(f"\n=== Round {r} (Encryption) ===")
 
         x, y, z = rotate_planes(x, y, z)
-        print_state(x, y, z, "After rotation")
+        if verbose:
+            print_state(x, y, z, "After rotation")
 
         x, y, z = sbox_lanes(x, y, z)
-        print_state(x, y, z, "After S-box layer")
+        if verbose:
+            print_state(x, y, z, "After S-box layer")
 
         if r % 4 == 0:
             x, y, z = small_swap(x, y, z)
-            print("Applied small swap")
+            if verbose:
+                print("Applied small swap")
         elif r % 4 == 2:
             x, y, z = big_swap(x, y, z)
-            print("Applied big swap")
-        print_state(x, y, z, "After swap")
+            if verbose:
+                print("Applied big swap")
+        if verbose:
+            print_state(x, y, z, "After swap")
 
         x = add_round_constant(x, r)
-        print_state(x, y, z, "After round constant")
+        if verbose:
+            print_state(x, y, z, "After round constant")
 
-    print("\n=== Final encrypted state ===")
-    print_state(x, y, z, "Ciphertext")
+    if verbose:
+        print("\n=== Final encrypted state ===")
+        print_state(x, y, z, "Ciphertext")
     return x, y, z
 
 # ---------------------------
 # Decryption (inverse)
 # ---------------------------
-def gimli_decrypt(state, num_rounds=2):
+def gimli_decrypt(state, num_rounds=2, verbose=False):
     rounds = [24 - i for i in range(num_rounds)]
-    x, y, z = state
-    print_state(x, y, z, "Initial ciphertext state")
+    x, y, z = state[0][:], state[1][:], state[2][:]
+    if verbose:
+        print_state(x, y, z, "Initial ciphertext state")
 
     for r in reversed(rounds):
-        print(f"\n=== Round {r} (Decryption) ===")
+        if verbose:
+            print(f"\n=== Round {r} (Decryption) ===")
 
         x = remove_round_constant(x, r)
-        print_state(x, y, z, "After removing round constant")
+        if verbose:
+            print_state(x, y, z, "After removing round constant")
 
         if r % 4 == 0:
             x, y, z = small_swap(x, y, z)
-            print("Reversed small swap")
+            if verbose:
+                print("Reversed small swap")
         elif r % 4 == 2:
             x, y, z = big_swap(x, y, z)
-            print("Reversed big swap")
-        print_state(x, y, z, "After undoing swap")
+            if verbose:
+                print("Reversed big swap")
+        if verbose:
+            print_state(x, y, z, "After undoing swap")
 
         x, y, z = inv_sbox_lanes(x, y, z)
-        print_state(x, y, z, "After inverse S-box")
+        if verbose:
+            print_state(x, y, z, "After inverse S-box")
 
         x, y, z = inv_rotate_planes(x, y, z)
-        print_state(x, y, z, "After inverse rotation")
+        if verbose:
+            print_state(x, y, z, "After inverse rotation")
 
-    print("\n=== Final decrypted state ===")
-    print_state(x, y, z, "Plaintext recovered")
+    if verbose:
+        print("\n=== Final decrypted state ===")
+        print_state(x, y, z, "Plaintext recovered")
     return x, y, z
 
 # ---------------------------
@@ -178,7 +183,7 @@ if __name__ == "__main__":
     )
 
     print("\n=== ENCRYPTION (2 Rounds) ===")
-    enc_state = gimli_encrypt(state, num_rounds=2)
+    enc_state = gimli_encrypt(state, num_rounds=2, verbose=True)
 
     print("\n\n=== DECRYPTION (2 Rounds) ===")
-    dec_state = gimli_decrypt(enc_state, num_rounds=2)
+    dec_state = gimli_decrypt(enc_state, num_rounds=2, verbose=True)
@@ -3,9 +3,13 @@
 # Impossible Differential Attack on 3-Round Toy-Gimli
 # =============================================
 
-import random
+from functools import lru_cache
+
+import numpy as np
 import toy_gimli
 from toy_gimli import (
+    ROTR2,
+    ROTR6,
     inv_rotate_planes,
     inv_sbox_lanes,
     remove_round_constant,
@@ -28,12 +32,19 @@ from toy_gimli import (
 INPUT_DIFF = ([0x01, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0])
 # We don't need to specify the output diff, just check if the planes other than x are zero.
 
+# Vectorized tail: states are uint8 rows [x0..x3, y0..y3, z0..z3]
+GUESSES = np.arange(256, dtype=np.uint8)
+ROTR6_ARRAY = np.frombuffer(ROTR6, dtype=np.uint8)
+ROTR2_ARRAY = np.frombuffer(ROTR2, dtype=np.uint8)
+SMALL_SWAP_INDEX = [1, 0, 3, 2]
+BIG_SWAP_INDEX = [2, 3, 0, 1]
+
 # ------------------------------------------- 
 # Key Recovery Attack
 # ------------------------------------------- 
 
 def recover_key(
-    num_pairs=2 ** 10, rounds=(24, 23, 22), correct_key_r22=0x9E ^ 22
+    num_pairs=2 ** 10, rounds=(24, 23, 22), correct_key_r22=0x9E ^ 22, seed=None
 ):
     """Recovers the last round subkey using an impossible differential.
 
@@ -41,21 +52,22 @@ def recover_key(
         num_pairs: The number of chosen-plaintext pairs to use.
         rounds: The rounds used for encryption.
         correct_key_r22: The correct subkey for the last round (for verification).
+        seed: Optional seed for the plaintext generator.
     """
     print("=== Impossible Differential Attack ===")
     print(f"Using {num_pairs} chosen-plaintext pairs.")
 
     # The round constant for the last round (r=22) is ROUND_CONSTANT ^ 22
     # We are attacking this subkey.
-    possible_subkeys = list(range(256))
+    eliminated = np.zeros(256, dtype=bool)
+
+    # Draw every P1 up front: one (x, y, z) block of 3 x 4 bytes per pair
+    rng = np.random.default_rng(seed)
+    plaintexts = rng.integers(0, 256, size=(num_pairs, 3, 4), dtype=np.uint8)
 
     for i in range(num_pairs):
-        # 1. Generate a random plaintext P1
-        p1 = (
-            [random.randint(0, 255) for _ in range(4)],
-            [random.randint(0, 255) for _ in range(4)],
-            [random.randint(0, 255) for _ in range(4)],
-        )
+        # 1. Take the next random plaintext P1
+        p1 = tuple(plaintexts[i].tolist())
 
         # 2. Create P2 by XORing P1 with the input differential
         p2_x = [p1[0][j] ^ INPUT_DIFF[0][j] for j in range(4)]
@@ -66,24 +78,25 @@ def recover_key(
         c1 = toy_gimli.gimli_encrypt_3rounds(p1, rounds, verbose=False)
         c2 = toy_gimli.gimli_encrypt_3rounds(p2, rounds, verbose=False)
 
-        # 4. For each candidate subkey, check if it's impossible
-        for subkey_guess in possible_subkeys[:]:
-            # Partially decrypt C1 and C2 by one round
-            c1_prime = partial_decrypt_one_round(c1, rounds[-1], subkey_guess)
-            c2_prime = partial_decrypt_one_round(c2, rounds[-1], subkey_guess)
-
-            # Calculate the difference after partial decryption
-            diff_x = [c1_prime[0][j] ^ c2_prime[0][j] for j in range(4)]
-            diff_y = [c1_prime[1][j] ^ c2_prime[1][j] for j in range(4)]
-            diff_z = [c1_prime[2][j] ^ c2_prime[2][j] for j in range(4)]
-
-            # Check for the impossible differential property
-            # The difference should not be of the form ([d'], 0, 0)
-            # This means diff_y and diff_z should not be all zero.
-            if all(v == 0 for v in diff_y) and all(v == 0 for v in diff_z):
-                # This subkey is impossible, so we remove it
-                possible_subkeys.remove(subkey_guess)
-                break  # Move to the next plaintext pair
+        # 4. Partially decrypt C1 and C2 by one round under every guess
+        diffs = (partial_decrypt_all_guesses(c1, rounds[-1])
+                 ^ partial_decrypt_all_guesses(c2, rounds[-1]))
+
+        # 5. Check for the impossible differential property
+        # The difference should not be of the form ([d'], 0, 0),
+        # i.e. the y and z differences should not be all zero.
+        impossible = ~diffs[:, 4:].any(axis=1)
+        hits = np.flatnonzero(impossible & ~eliminated)
+        if hits.size:
+            # Remove the first such subkey and move to the next pair
+            eliminated[hits[0]] = True
+
+            # Further pairs cannot narrow a single candidate down
+            if np.count_nonzero(~eliminated) <= 1:
+                print(f"Candidates narrowed to one after {i + 1} pairs.")
+                break
+
+    possible_subkeys = np.flatnonzero(~eliminated).tolist()
 
     print("\n=== Attack Results ===")
     print(f"Correct subkey for round 22: {correct_key_r22}")
@@ -95,6 +108,26 @@ def recover_key(
         print("Attack failed! The correct subkey was eliminated.")
 
 
+def decrypt_tail(x, y, z, r):
+    """Key-independent rest of a round inverse: swap, S-box, rotation.
+
+    x is swapped in place, so pass a copy the caller owns.
+    """
+    # Inverse of swap
+    if r % 4 == 0:
+        x, y, z = small_swap(x, y, z)
+    elif r % 4 == 2:
+        x, y, z = big_swap(x, y, z)
+
+    # Inverse of S-box
+    x, y, z = inv_sbox_lanes(x, y, z)
+
+    # Inverse of rotation
+    x, y, z = inv_rotate_planes(x, y, z)
+
+    return x, y, z
+
+
 def partial_decrypt_one_round(state, r, subkey_guess):
     """Partially decrypts the state by one round with a guessed subkey."""
     x, y, z = state
@@ -104,52 +137,105 @@ def partial_decrypt_one_round(state, r, subkey_guess):
     if r % 4 == 0:
         x[0] ^= subkey_guess
 
+    return decrypt_tail(x, y, z, r)
+
+
+def decrypt_tail_array(states, r):
+    """decrypt_tail on a (..., 12) uint8 array of states."""
+    x, y, z = states[..., 0:4], states[..., 4:8], states[..., 8:12]
+
     # Inverse of swap
-    combined = x + y + z
     if r % 4 == 0:
-        combined = small_swap(combined)
+        x = x[..., SMALL_SWAP_INDEX]
     elif r % 4 == 2:
-        combined = big_swap(combined)
-    x, y, z = combined[0:4], combined[4:8], combined[8:12]
+        x = x[..., BIG_SWAP_INDEX]
 
-    # Inverse of S-box
-    x, y, z = inv_sbox_lanes(x, y, z)
+    # Inverse of S-box (bitsliced, as in inv_sbox_lanes)
+    new_x = (x ^ (z & ~y)) ^ 0xff
+    new_y = (y | z) ^ (x & z)
+    new_z = (x | z) ^ (x & y)
 
     # Inverse of rotation
-    x, y, z = inv_rotate_planes(x, y, z)
+    return np.concatenate(
+        (ROTR6_ARRAY[new_x], ROTR2_ARRAY[new_y], new_z), axis=-1
+    )
+
+
+@lru_cache(maxsize=4096)
+def _all_guesses_cached(state_bytes, r):
+    base = np.frombuffer(state_bytes, dtype=np.uint8)
+    if r % 4 != 0:
+        tails = np.broadcast_to(decrypt_tail_array(base, r), (256, 12))
+    else:
+        states = np.tile(base, (256, 1))
+        states[:, 0] ^= GUESSES
+        tails = decrypt_tail_array(states, r)
+    # Shared between callers through the cache
+    tails.flags.writeable = False
+    return tails
+
+
+def partial_decrypt_all_guesses(state, r):
+    """partial_decrypt_one_round for all 256 subkey guesses.
+
+    Returns a read-only (256, 12) uint8 array whose row g is the state under
+    guess g. The guess is only XORed in on rounds that carry a constant
+    (r % 4 == 0); on the others every guess decrypts to the same state,
+    computed once. Results are memoized on the ciphertext bytes.
+    """
+    x, y, z = state
+    return _all_guesses_cached(bytes(x + y + z), r)
 
+
+# Default for gimli_encrypt_3rounds_silent; the attack itself never prints
+# per-round states.
+VERBOSE = False
+
+
+def encrypt_rounds(state, rounds):
+    """The encryption rounds alone, with no printing or verbose checks."""
+    x, y, z = state
+    for r in rounds:
+        x, y, z = rotate_planes(x, y, z)
+        x, y, z = sbox_lanes(x, y, z)
+        if r % 4 == 0:
+            x, y, z = small_swap(x, y, z)
+        elif r % 4 == 2:
+            x, y, z = big_swap(x, y, z)
+        x = add_round_constant(x, r)
     return x, y, z
 
 
 # Monkey-patch the encryption function to accept a verbose flag
-def gimli_encrypt_3rounds_silent(state, rounds, verbose=True):
+def gimli_encrypt_3rounds_silent(state, rounds, verbose=VERBOSE):
+    if not verbose:
+        return encrypt_rounds(state, rounds)
+
     x, y, z = state
-    if verbose: print_state(x, y, z, "Initial state")
+    print_state(x, y, z, "Initial state")
 
     for r in rounds:
-        if verbose: print(f"\n=== Round {r} (Encryption) ===")
+        print(f"\n=== Round {r} (Encryption) ===")
 
         x, y, z = rotate_planes(x, y, z)
-        if verbose: print_state(x, y, z, "After rotation")
+        print_state(x, y, z, "After rotation")
 
         x, y, z = sbox_lanes(x, y, z)
-        if verbose: print_state(x, y, z, "After S-box layer")
+        print_state(x, y, z, "After S-box layer")
 
-        combined = x + y + z
         if r % 4 == 0:
-            combined = small_swap(combined)
-            if verbose: print("Applied small swap")
+            x, y, z = small_swap(x, y, z)
+            print("Applied small swap")
         elif r % 4 == 2:
-            combined = big_swap(combined)
-            if verbose: print("Applied big swap")
-        x, y, z = combined[0:4], combined[4:8], combined[8:12]
-        if verbose: print_state(x, y, z, "After swap")
+            x, y, z = big_swap(x, y, z)
+            print("Applied big swap")
+        print_state(x, y, z, "After swap")
 
         x = add_round_constant(x, r)
-        if verbose: print_state(x, y, z, "After round constant")
+        print_state(x, y, z, "After round constant")
 
-    if verbose: print("\n=== Final encrypted state ===")
-    if verbose: print_state(x, y, z, "Ciphertext")
+    print("\n=== Final encrypted state ===")
+    print_state(x, y, z, "Ciphertext")
     return x, y, z
 
 import toy_gimli
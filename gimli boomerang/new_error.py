@@ -11,8 +11,8 @@ import numpy as np
 # -------------------------------------------------
 # Define S-box and its inverse
 # -------------------------------------------------
-SBOX = [7, 4, 6, 1, 0, 5, 2, 3]
-SBOX_INV = [SBOX.index(i) for i in range(len(SBOX))]
+from common_sbox import SBOX, INV_SBOX as SBOX_INV
+
 N = len(SBOX) # Size of the S-box (e.g., 2^3 = 8)
 
 # -------------------------------------------------
@@ -23,19 +23,19 @@ def compute_bdt(sbox, sbox_inv):
     Computes the Boomerang Distribution Table (BDT) for a given S-box.
     BDT[α,β] = #{x : S(x) ⊕ S(x ⊕ α) = y, S⁻¹(y) ⊕ S⁻¹(y ⊕ β) = α}
     """
-    bdt = np.zeros((N, N), dtype=int)
-    for alpha in range(N):
-        for beta in range(N):
-            for x in range(N):
-                # Condition 1: S(x) ⊕ S(x ⊕ α) = y
-                y = sbox[x] ^ sbox[x ^ alpha]
-                
-                # Condition 2: S⁻¹(y) ⊕ S⁻¹(y ⊕ β) = α
-                # Need to handle cases where y or y^beta might be out of SBOX_INV domain
-                # For a permutation S-box, SBOX_INV is defined for all values 0 to N-1
-                # So y and y^beta will always be valid inputs to SBOX_INV
-                if (sbox_inv[y] ^ sbox_inv[y ^ beta]) == alpha:
-                    bdt[alpha][beta] += 1
+    sbox = np.asarray(sbox)
+    sbox_inv = np.asarray(sbox_inv)
+    x = np.arange(len(sbox))
+
+    # Condition 1: y = S(x) ⊕ S(x ⊕ α), indexed [α, x]
+    y = sbox[x] ^ sbox[x ^ x[:, None]]
+
+    # Condition 2: S⁻¹(y) ⊕ S⁻¹(y ⊕ β) = α, indexed [α, β, x]
+    y = y[:, None, :]
+    beta = x[None, :, None]
+    alpha = x[:, None, None]
+    match = (sbox_inv[y] ^ sbox_inv[y ^ beta]) == alpha
+    bdt = match.sum(axis=-1)
     return bdt
 
 # -------------------------------------------------
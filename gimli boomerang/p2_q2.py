@@ -1,10 +1,9 @@
 
 import math
 
-# The S-box from your enc_dec_gim.py file
-SBOX = [7, 4, 6, 1, 0, 5, 2, 3]
-# The inverse S-box, required for the E1 part of the boomerang attack
-INV_SBOX = [SBOX.index(i) for i in range(len(SBOX))]
+# The S-box from your enc_dec_gim.py file, and its inverse (required for
+# the E1 part of the boomerang attack)
+from common_sbox import SBOX, INV_SBOX
 
 def calculate_ddt(sbox):
     """Calculates the Differential Distribution Table (DDT) for a given S-box."""
@@ -65,7 +64,7 @@ def main():
 
     # --- Part 2: Analyze the inverse S-box to find a trail for E1 ---
     print("\n[E1 Analysis - Inverse S-box]")
-    print(f"Inverse S-BOX: {INV_SBOX}")
+    print(f"Inverse S-BOX: {list(INV_SBOX)}")
     ddt_inverse = calculate_ddt(INV_SBOX)
     print("\nDDT for inverse S-BOX (γ -> δ):")
     print_ddt(ddt_inverse)
@@ -6,8 +6,7 @@ until a successful boomerang quartet is found.
 
 import random
 
-SBOX = [7, 4, 6, 1, 0, 5, 2, 3]
-INV_SBOX = [SBOX.index(i) for i in range(len(SBOX))]
+from common_sbox import SBOX, INV_SBOX
 
 def simulate_real_attack():
     """
@@ -3,11 +3,13 @@ This script performs a realistic boomerang attack simulation
 and prints a concise summary of the probabilities.
 '''
 
-import random
+import numpy as np
 
-SBOX = [7, 4, 6, 1, 0, 5, 2, 3]
+from common_sbox import SBOX
 
-def simulate_right_quartet_prob_summary():
+SBOX_ARRAY = np.array(SBOX, dtype=np.uint8)
+
+def simulate_right_quartet_prob_summary(seed=None):
     """
     Estimates the boomerang probability by randomly searching for right quartets
     and prints a concise summary.
@@ -24,23 +26,20 @@ def simulate_right_quartet_prob_summary():
     
     # We need a large number of trials for a good statistical estimate
     num_trials = 100000
-    success_count = 0
-    
-    for i in range(num_trials):
-        # In each trial, we pick two random plaintexts
-        P = random.randint(0, 7)
-        R = random.randint(0, 7)
-
-        # Form the other two plaintexts in the potential quartet
-        P_prime = P ^ alpha
-        R_prime = R ^ alpha
-
-        # Check if the two conditions for a 'right quartet' are met
-        condition1 = (SBOX[P] ^ SBOX[R]) == gamma
-        condition2 = (SBOX[P_prime] ^ SBOX[R_prime]) == gamma
-        
-        if condition1 and condition2:
-            success_count += 1
+
+    # Pick the two random plaintexts of every trial in one go
+    rng = np.random.default_rng(seed)
+    P = rng.integers(0, 8, size=num_trials, dtype=np.uint8)
+    R = rng.integers(0, 8, size=num_trials, dtype=np.uint8)
+
+    # Form the other two plaintexts in the potential quartets
+    P_prime = P ^ alpha
+    R_prime = R ^ alpha
+
+    # Check if the two conditions for a 'right quartet' are met
+    condition1 = (SBOX_ARRAY[P] ^ SBOX_ARRAY[R]) == gamma
+    condition2 = (SBOX_ARRAY[P_prime] ^ SBOX_ARRAY[R_prime]) == gamma
+    success_count = int(np.count_nonzero(condition1 & condition2))
 
     observed_prob = success_count / num_trials
     
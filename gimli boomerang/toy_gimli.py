@@ -6,6 +6,8 @@
 # =============================================
 
 ROUND_CONSTANT = 0x9e
+# Round constants of the 24-round schedule (only rounds r % 4 == 0 have one)
+ROUND_XOR = {r: ROUND_CONSTANT ^ r for r in range(25) if r % 4 == 0}
 
 def rotl8(x, n):
     return ((x << n) | (x >> (8 - n))) & 0xff
@@ -16,72 +18,66 @@ def rotr8(x, n):
 # ---------------------------
 # 3-bit S-box and its inverse
 # ---------------------------
-SBOX = [7, 4, 6, 1, 0, 5, 2, 3]
-INV_SBOX = [SBOX.index(i) for i in range(8)]
+from common_sbox import SBOX, INV_SBOX
 
 def sbox_lanes(x, y, z):
-    new_x, new_y, new_z = [], [], []
-    for xi, yi, zi in zip(x, y, z):
-        sx = sy = sz = 0
-        for bit in range(8):
-            a = (xi >> bit) & 1
-            b = (yi >> bit) & 1
-            c = (zi >> bit) & 1
-            val = SBOX[(a << 2) | (b << 1) | c]
-            sx |= ((val >> 2) & 1) << bit
-            sy |= ((val >> 1) & 1) << bit
-            sz |= (val & 1) << bit
-        new_x.append(sx)
-        new_y.append(sy)
-        new_z.append(sz)
+    # Bitsliced SBOX: bit i of (x, y, z) is one 3-bit input (a, b, c),
+    # so a handful of word-wide Boolean ops evaluates every bit at once.
+    new_x, new_y, new_z = [0] * 4, [0] * 4, [0] * 4
+    for i in range(4):
+        a, b, c = x[i], y[i], z[i]
+        new_x[i] = ((a & ~c) | (b & c)) ^ 0xff
+        new_y[i] = ((a | c) ^ (a & b)) ^ 0xff
+        new_z[i] = ((a | b) ^ c) ^ 0xff
     return new_x, new_y, new_z
 
 def inv_sbox_lanes(x, y, z):
-    new_x, new_y, new_z = [], [], []
-    for xi, yi, zi in zip(x, y, z):
-        sx = sy = sz = 0
-        for bit in range(8):
-            a = (xi >> bit) & 1
-            b = (yi >> bit) & 1
-            c = (zi >> bit) & 1
-            val = INV_SBOX[(a << 2) | (b << 1) | c]
-            sx |= ((val >> 2) & 1) << bit
-            sy |= ((val >> 1) & 1) << bit
-            sz |= (val & 1) << bit
-        new_x.append(sx)
-        new_y.append(sy)
-        new_z.append(sz)
+    # Bitsliced INV_SBOX, same lane layout as sbox_lanes.
+    new_x, new_y, new_z = [0] * 4, [0] * 4, [0] * 4
+    for i in range(4):
+        a, b, c = x[i], y[i], z[i]
+        new_x[i] = (a ^ (c & ~b)) ^ 0xff
+        new_y[i] = (b | c) ^ (a & c)
+        new_z[i] = (a | c) ^ (a & b)
     return new_x, new_y, new_z
 
 # ---------------------------
 # Rotations and swaps
 # ---------------------------
+# Byte rotation tables: one lookup instead of shift/or/mask per word
+ROTL6 = bytes(rotl8(w, 6) for w in range(256))
+ROTL2 = bytes(rotl8(w, 2) for w in range(256))
+ROTR6 = ROTL2
+ROTR2 = ROTL6
+
 def rotate_planes(x, y, z):
-    return ([rotl8(w, 6) for w in x],
-            [rotl8(w, 2)  for w in y],
+    return ([ROTL6[w] for w in x],
+            [ROTL2[w] for w in y],
             z)
 
 def inv_rotate_planes(x, y, z):
-    return ([rotr8(w, 6) for w in x],
-            [rotr8(w, 2)  for w in y],
+    return ([ROTR6[w] for w in x],
+            [ROTR2[w] for w in y],
             z)
 
-def small_swap(state):
-    s = state[:]
-    s[0], s[1] = s[1], s[0]
-    s[2], s[3] = s[3], s[2]
-    return s
+# Both swaps only move words of the x plane, in place: callers always
+# hand in a plane they own.
+def small_swap(x, y, z):
+    x[0], x[1] = x[1], x[0]
+    x[2], x[3] = x[3], x[2]
+    return x, y, z
 
-def big_swap(state):
-    s = state[:]
-    s[0], s[2] = s[2], s[0]
-    s[1], s[3] = s[3], s[1]
-    return s
+def big_swap(x, y, z):
+    x[0], x[2] = x[2], x[0]
+    x[1], x[3] = x[3], x[1]
+    return x, y, z
 
 def add_round_constant(x, round_number):
-    x = x[:]
-    if round_number % 4 == 0:
-        x[0] ^= (ROUND_CONSTANT ^ round_number)
+    # In place: callers always hand in a plane they own.
+    if round_number in ROUND_XOR:
+        x[0] ^= ROUND_XOR[round_number]
+    elif round_number % 4 == 0:
+        x[0] ^= ROUND_CONSTANT ^ round_number
     return x
 
 def remove_round_constant(x, round_number):
@@ -113,14 +109,12 @@ def gimli_encrypt_3rounds(state, rounds=(24, 23, 22)):
         x, y, z = sbox_lanes(x, y, z)
         print_state(x, y, z, "After S-box layer")
 
-        combined = x + y + z
         if r % 4 == 0:
-            combined = small_swap(combined)
+            x, y, z = small_swap(x, y, z)
             print("Applied small swap")
         elif r % 4 == 2:
-            combined = big_swap(combined)
+            x, y, z = big_swap(x, y, z)
             print("Applied big swap")
-        x, y, z = combined[0:4], combined[4:8], combined[8:12]
         print_state(x, y, z, "After swap")
 
         x = add_round_constant(x, r)
@@ -134,7 +128,7 @@ def gimli_encrypt_3rounds(state, rounds=(24, 23, 22)):
 # Decryption (inverse)
 # ---------------------------
 def gimli_decrypt_3rounds(state, rounds=(24, 23, 22)):
-    x, y, z = state
+    x, y, z = state[0][:], state[1][:], state[2][:]
     print_state(x, y, z, "Initial ciphertext state")
 
     for r in reversed(rounds):
@@ -143,14 +137,12 @@ def gimli_decrypt_3rounds(state, rounds=(24, 23, 22)):
         x = remove_round_constant(x, r)
         print_state(x, y, z, "After removing round constant")
 
-        combined = x + y + z
         if r % 4 == 0:
-            combined = small_swap(combined)
+            x, y, z = small_swap(x, y, z)
             print("Reversed small swap")
         elif r % 4 == 2:
-            combined = big_swap(combined)
+            x, y, z = big_swap(x, y, z)
             print("Reversed big swap")
-        x, y, z = combined[0:4], combined[4:8], combined[8:12]
         print_state(x, y, z, "After undoing swap")
 
         x, y, z = inv_sbox_lanes(x, y, z)
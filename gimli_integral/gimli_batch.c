@@ -0,0 +1,94 @@
+// C version of gimli_perm32 (zero_sum_reduce.py) over a batch of states,
+// loaded from Python via ctypes (see gimli_batch.py). Build with `make ext`.
+//
+// Each state is 12 consecutive words [x0..x3, y0..y3, z0..z3]; rounds run
+// R, R-1, ..., 1 as in the reference Gimli permutation.
+
+#include <stddef.h>
+#include <stdint.h>
+
+#ifdef __SSE2__
+#include <emmintrin.h>
+#endif
+
+// GCC and clang compile this to a single rotate instruction
+#define ROTL32(x,b) (((x) << (b)) | ((x) >> (32 - (b))))
+
+#define SWAP(s,i,j) do { t = (s)[i]; (s)[i] = (s)[j]; (s)[j] = t; } while (0)
+
+#ifdef __SSE2__
+// The four columns go through identical SP-box operations, so each plane is
+// one 128-bit register and a round is a handful of SSE2 instructions.
+#define ROTL128(v,b) _mm_or_si128(_mm_slli_epi32((v), (b)), _mm_srli_epi32((v), 32 - (b)))
+
+static void gimli_perm32(uint32_t state[12], int rounds)
+{
+    __m128i x = _mm_loadu_si128((const __m128i *)&state[0]);
+    __m128i y = _mm_loadu_si128((const __m128i *)&state[4]);
+    __m128i z = _mm_loadu_si128((const __m128i *)&state[8]);
+    __m128i a, b;
+    for(int r = rounds; r >= 1; r--)
+    {
+        a = ROTL128(x, 24);
+        b = ROTL128(y, 9);
+
+        x = _mm_xor_si128(_mm_xor_si128(z, b),
+                          _mm_slli_epi32(_mm_and_si128(a, b), 3));
+        y = _mm_xor_si128(_mm_xor_si128(b, a),
+                          _mm_slli_epi32(_mm_or_si128(a, z), 1));
+        z = _mm_xor_si128(_mm_xor_si128(a, _mm_slli_epi32(z, 1)),
+                          _mm_slli_epi32(_mm_and_si128(b, z), 2));
+
+        if((r & 3) == 0)
+        {
+            x = _mm_shuffle_epi32(x, _MM_SHUFFLE(2, 3, 0, 1));
+            x = _mm_xor_si128(x, _mm_cvtsi32_si128((int)(0x9e377900u | (uint32_t)r)));
+        }
+        else if((r & 3) == 2)
+        {
+            x = _mm_shuffle_epi32(x, _MM_SHUFFLE(1, 0, 3, 2));
+        }
+    }
+    _mm_storeu_si128((__m128i *)&state[0], x);
+    _mm_storeu_si128((__m128i *)&state[4], y);
+    _mm_storeu_si128((__m128i *)&state[8], z);
+}
+#else
+static void gimli_perm32(uint32_t state[12], int rounds)
+{
+    uint32_t x, y, z, t;
+    for(int r = rounds; r >= 1; r--)
+    {
+        for(int col = 0; col < 4; col++)
+        {
+            x = ROTL32(state[col], 24);
+            y = ROTL32(state[col+4], 9);
+            z = state[col+8];
+
+            state[col+8] = x ^ (z << 1) ^ ((y & z) << 2);
+            state[col+4] = y ^ x ^ ((x | z) << 1);
+            state[col]   = z ^ y ^ ((x & y) << 3);
+        }
+
+        if((r & 3) == 0)
+        {
+            SWAP(state, 0, 1);
+            SWAP(state, 2, 3);
+            state[0] ^= (0x9e377900u | (uint32_t)r);
+        }
+        else if((r & 3) == 2)
+        {
+            SWAP(state, 0, 2);
+            SWAP(state, 1, 3);
+        }
+    }
+}
+
+#endif
+
+// Permutes n states stored back to back, in place
+void gimli_batch(uint32_t *states, size_t n, int rounds)
+{
+    for(size_t i = 0; i < n; i++)
+        gimli_perm32(states + 12 * i, rounds);
+}
@@ -0,0 +1,32 @@
+"""
+ctypes bindings for gimli_batch.c.
+
+Build the shared library with `make ext`; when it is missing AVAILABLE is
+False and zero_sum_reduce.py keeps using its Numba kernel.
+"""
+
+import ctypes
+import os
+
+import numpy as np
+
+LIB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "libgimli_batch.so")
+
+try:
+    _lib = ctypes.CDLL(LIB_PATH)
+except OSError:
+    _lib = None
+
+AVAILABLE = _lib is not None
+
+if AVAILABLE:
+    _lib.gimli_batch.argtypes = (ctypes.POINTER(ctypes.c_uint32), ctypes.c_size_t, ctypes.c_int)
+    _lib.gimli_batch.restype = None
+
+
+def permute_batch(states, rounds):
+    """gimli_perm32 in place on a C-contiguous uint32 array of shape (n, 12)."""
+    assert states.dtype == np.uint32 and states.flags.c_contiguous
+    _lib.gimli_batch(states.ctypes.data_as(ctypes.POINTER(ctypes.c_uint32)),
+                     states.shape[0], rounds)
+    return states
@@ -1,22 +1,57 @@
 #!/usr/bin/env python3
 # gimli_reduced_integral.py
 # Run reduced-round integral-style tests on Gimli (32-bit words).
-from itertools import product
 import time
 
+import numpy as np
+from numba import get_num_threads, njit, prange
+
+try:
+    import gimli_batch
+except ImportError:
+    gimli_batch = None
+
+# Trial states handed to the C extension per call
+BATCH_SIZE = 1 << 16
+
 def rol32(x, r):
     return ((x << r) & 0xFFFFFFFF) | ((x & 0xFFFFFFFF) >> (32 - r))
 
 def gimli_perm32(state, rounds=24):
-    st = state[:]
+    # SoA layout: x, y, z are views of the three 4-word planes along the last
+    # axis, so each SP-box step updates all four columns in one array op.
+    # Works on a single 12-word state (returned as a list) or on (..., 12).
+    st = np.array(state, dtype=np.uint32)
+    x, y, z = st[..., 0:4], st[..., 4:8], st[..., 8:12]
+    for rnd in range(rounds, 0, -1):
+        a = rol32(x, 24)
+        b = rol32(y, 9)
+        new_z = a ^ (z << 1) ^ ((b & z) << 2)
+        new_y = b ^ a ^ ((a | z) << 1)
+        new_x = z ^ b ^ ((a & b) << 3)
+        x[...] = new_x
+        y[...] = new_y
+        z[...] = new_z
+        if (rnd & 3) == 0:
+            x[...] = x[..., [1, 0, 3, 2]]
+        if (rnd & 3) == 2:
+            x[...] = x[..., [2, 3, 0, 1]]
+        if (rnd & 3) == 0:
+            const = (rnd | 0x9e377900) & 0xFFFFFFFF
+            x[..., 0] ^= const
+    return st.tolist() if st.ndim == 1 else st
+
+@njit(cache=True, boundscheck=False)
+def gimli_perm32_inplace(st, rounds):
+    """Compiled gimli_perm32 on a flat int64[12] state holding 32-bit words."""
     for rnd in range(rounds, 0, -1):
         for col in range(4):
-            x = rol32(st[col], 24)
-            y = rol32(st[4+col], 9)
+            x = ((st[col] << 24) | (st[col] >> 8)) & 0xFFFFFFFF
+            y = ((st[4+col] << 9) | (st[4+col] >> 23)) & 0xFFFFFFFF
             z = st[8+col]
-            st[8+col] = x ^ ((z << 1) & 0xFFFFFFFF) ^ ((y & z) << 2 & 0xFFFFFFFF)
-            st[4+col] = y ^ x ^ (((x | z) << 1) & 0xFFFFFFFF)
-            st[col]     = z ^ y ^ (((x & y) << 3) & 0xFFFFFFFF)
+            st[8+col] = (x ^ (z << 1) ^ ((y & z) << 2)) & 0xFFFFFFFF
+            st[4+col] = (y ^ x ^ ((x | z) << 1)) & 0xFFFFFFFF
+            st[col]   = (z ^ y ^ ((x & y) << 3)) & 0xFFFFFFFF
         if (rnd & 3) == 0:
             st[0], st[1] = st[1], st[0]
             st[2], st[3] = st[3], st[2]
@@ -24,30 +59,68 @@ def gimli_perm32(state, rounds=24):
             st[0], st[2] = st[2], st[0]
             st[1], st[3] = st[3], st[1]
         if (rnd & 3) == 0:
-            const = (rnd | 0x9e377900) & 0xFFFFFFFF
-            st[0] ^= const
-    return [x & 0xFFFFFFFF for x in st]
+            st[0] ^= rnd | 0x9e377900
+
+@njit(parallel=True, cache=True)
+def run_trials(vary_indices, t_bits, base, rounds, nchunks):
+    """
+    XOR of gimli_perm32 over all 2**(t_bits * k) trials. Trial t sets the low
+    t_bits of vary_indices[j] to digit j of t in base 2**t_bits, most
+    significant first -- the order itertools.product yields. The trials are
+    split into `nchunks` contiguous ranges, one per thread.
+    """
+    k = vary_indices.shape[0]
+    mask = (1 << t_bits) - 1
+    total = 1 << (t_bits * k)
+    nchunks = min(nchunks, total)
+    partial = np.zeros((nchunks, 12), dtype=np.int64)
+    for c in prange(nchunks):
+        st = np.empty(12, dtype=np.int64)
+        for t in range(c * total // nchunks, (c + 1) * total // nchunks):
+            st[:] = base
+            for j in range(k):
+                idx = vary_indices[j]
+                val = (t >> (t_bits * (k - 1 - j))) & mask
+                st[idx] = (st[idx] & ~mask) | val
+            gimli_perm32_inplace(st, rounds)
+            for i in range(12):
+                partial[c, i] ^= st[i]
+    acc = np.zeros(12, dtype=np.int64)
+    for c in range(nchunks):
+        for i in range(12):
+            acc[i] ^= partial[c, i]
+    return acc
+
+def run_trials_batched(vary_indices, t_bits, base, rounds):
+    """run_trials on the C extension: fill blocks of trial states, permute
+    each block in one call and XOR-reduce it."""
+    k = len(vary_indices)
+    mask = (1 << t_bits) - 1
+    total = 1 << (t_bits * k)
+    acc = np.zeros(12, dtype=np.uint32)
+    for start in range(0, total, BATCH_SIZE):
+        t = np.arange(start, min(start + BATCH_SIZE, total), dtype=np.uint64)
+        states = np.tile(base.astype(np.uint32), (t.size, 1))
+        for j, idx in enumerate(vary_indices):
+            val = ((t >> np.uint64(t_bits * (k - 1 - j))) & np.uint64(mask)).astype(np.uint32)
+            states[:, idx] = (states[:, idx] & np.uint32(~mask & 0xFFFFFFFF)) | val
+        gimli_batch.permute_batch(states, rounds)
+        acc ^= np.bitwise_xor.reduce(states, axis=0)
+    return acc.astype(np.int64)
 
 def test_lowbit_subspace(vary_indices, t_bits=8, fixed_values=None, rounds=6, show_progress=False):
     if fixed_values is None:
         fixed_values = {}
-    base = [fixed_values.get(i, 0) & 0xFFFFFFFF for i in range(12)]
-    k = len(vary_indices)
-    xor_acc = [0]*12
-    ranges = [range(1<<t_bits) for _ in range(k)]
-    processed = 0
+    base = np.array([fixed_values.get(i, 0) & 0xFFFFFFFF for i in range(12)], dtype=np.int64)
     start = time.time()
-    for vals in product(*ranges):
-        st = base[:]
-        for idx, val in zip(vary_indices, vals):
-            # set the low t_bits of word idx to val (keep high bits of base)
-            st[idx] = (st[idx] & (~((1<<t_bits)-1))) | val
-        out = gimli_perm32(st, rounds=rounds)
-        for i in range(12):
-            xor_acc[i] ^= out[i]
-        processed += 1
-        if show_progress and processed % 100000 == 0:
-            print("Processed", processed)
+    if gimli_batch is not None and gimli_batch.AVAILABLE:
+        xor_acc = run_trials_batched(vary_indices, t_bits, base, rounds).tolist()
+    else:
+        xor_acc = run_trials(np.array(vary_indices, dtype=np.int64), t_bits, base, rounds,
+                             get_num_threads()).tolist()
+    processed = 1 << (t_bits * len(vary_indices))
+    if show_progress:
+        print("Processed", processed)
     elapsed = time.time() - start
     zero = all(x == 0 for x in xor_acc)
     return zero, xor_acc, processed, elapsed
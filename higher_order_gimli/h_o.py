@@ -1,5 +1,8 @@
 import copy
 
+import numpy as np
+from numba import get_num_threads, njit, prange
+
 # ---------------------------
 # Gimli permutation (4 rounds for demo)
 # ---------------------------
@@ -7,16 +10,42 @@ def rotl32(x, n):
     return ((x << n) | (x >> (32 - n))) & 0xFFFFFFFF
 
 def gimli_permutation(state, rounds=4):
-    s = state[:]
+    # x, y, z are uint32 views of the three 4-word planes along the last axis,
+    # so each SP-box step updates all four columns in one array op (uint32
+    # shifts wrap, no masking needed). Works on a single 12-word state
+    # (returned as a list) or on a (..., 12) batch.
+    s = np.array(state, dtype=np.uint32)
+    x, y, z = s[..., 0:4], s[..., 4:8], s[..., 8:12]
+    for r in range(rounds, 0, -1):
+        a = rotl32(x, 24)
+        b = rotl32(y, 9)
+        new_z = a ^ (z << 1) ^ ((b & z) << 2)
+        new_y = b ^ a ^ ((a | z) << 1)
+        new_x = z ^ b ^ ((a & b) << 3)
+        x[...] = new_x
+        y[...] = new_y
+        z[...] = new_z
+
+        if r & 3 == 0:
+            x[...] = x[..., [1, 0, 3, 2]]
+            x[..., 0] ^= (0x9e377900 ^ r)
+        if r & 3 == 2:
+            x[...] = x[..., [2, 3, 0, 1]]
+
+    return s.tolist() if s.ndim == 1 else s
+
+@njit(cache=True, boundscheck=False)
+def gimli_permutation_inplace(s, rounds):
+    """Compiled gimli_permutation on a flat int64[12] state holding 32-bit words."""
     for r in range(rounds, 0, -1):
         for col in range(4):
-            x = rotl32(s[col], 24)
-            y = rotl32(s[col+4], 9)
+            x = ((s[col] << 24) | (s[col] >> 8)) & 0xFFFFFFFF
+            y = ((s[col+4] << 9) | (s[col+4] >> 23)) & 0xFFFFFFFF
             z = s[col+8]
 
-            s[col+8] = x ^ (z << 1 & 0xFFFFFFFF) ^ ((y & z) << 2 & 0xFFFFFFFF)
-            s[col+4] = y ^ x ^ ((x | z) << 1 & 0xFFFFFFFF)
-            s[col] = z ^ y ^ ((x & y) << 3 & 0xFFFFFFFF)
+            s[col+8] = (x ^ (z << 1) ^ ((y & z) << 2)) & 0xFFFFFFFF
+            s[col+4] = (y ^ x ^ ((x | z) << 1)) & 0xFFFFFFFF
+            s[col] = (z ^ y ^ ((x & y) << 3)) & 0xFFFFFFFF
 
         if r & 3 == 0:
             s[0], s[1] = s[1], s[0]
@@ -26,7 +55,37 @@ def gimli_permutation(state, rounds=4):
             s[0], s[2] = s[2], s[0]
             s[1], s[3] = s[3], s[1]
 
-    return s
+@njit(parallel=True, cache=True)
+def derivative_kernel(state, word_index, byte_index, basis, order, rounds, nchunks):
+    """
+    XOR of the target byte after gimli_permutation over the odd-weight
+    subsets of basis[:order]. The 2^order subsets are split into `nchunks`
+    contiguous ranges, one per thread.
+    """
+    total = 1 << order
+    nchunks = min(nchunks, total)
+    shift = 8 * byte_index
+    partial = np.zeros(nchunks, dtype=np.int64)
+    for c in prange(nchunks):
+        s = np.empty(12, dtype=np.int64)
+        for subset in range(c * total // nchunks, (c + 1) * total // nchunks):
+            delta = 0
+            weight = 0
+            for i in range(order):
+                if (subset >> i) & 1:
+                    delta ^= basis[i]
+                    weight ^= 1
+            # XOR according to alternating-sum formula
+            if weight == 0:
+                continue
+            s[:] = state
+            s[word_index] ^= delta << shift
+            gimli_permutation_inplace(s, rounds)
+            partial[c] ^= (s[word_index] >> shift) & 0xFF
+    result = 0
+    for c in range(nchunks):
+        result ^= partial[c]
+    return result
 
 # ---------------------------
 # Bit-basis for a byte
@@ -35,31 +94,50 @@ def byte_basis():
     return [1 << i for i in range(8)]
 
 # ---------------------------
-# Apply difference to one byte
+# Compute t-th order derivative for a byte
 # ---------------------------
-def apply_diff_byte(state, word_index, byte_index, basis, subset):
-    s = state[:]
-    b = (s[word_index] >> (8*byte_index)) & 0xFF
-    for i in range(len(basis)):
-        if subset & (1 << i):
-            b ^= basis[i]
-    s[word_index] = (s[word_index] & ~(0xFF << (8*byte_index))) | (b << (8*byte_index))
-    return s
+def higher_order_derivative_byte(state, word_index, byte_index, order, rounds=4):
+    basis = np.array(byte_basis(), dtype=np.int64)
+    # The kernel indexes basis[:order] without bounds checks
+    if not 0 <= order <= len(basis):
+        raise ValueError(f"order must be between 0 and {len(basis)}, got {order}")
+    return int(derivative_kernel(np.array(state, dtype=np.int64), word_index, byte_index,
+                                 basis, order, rounds, get_num_threads()))
 
 # ---------------------------
-# Compute t-th order derivative for a byte
+# Derivatives of every order for all bytes
 # ---------------------------
-def higher_order_derivative_byte(state, word_index, byte_index, order, rounds=4):
+def all_byte_derivatives(state, max_order, rounds=4):
+    """
+    Orders 1..max_order of the derivative for every (word, byte) from one
+    batched permutation. Order k only uses the subsets below 2^k, so each
+    byte's 2^max_order encryptions serve all orders: a running XOR over the
+    odd-weight subsets, read off at 2^k - 1.
+    Returns an array indexed [word_index, byte_index, order - 1].
+    """
     basis = byte_basis()
-    result = 0
-    for subset in range(1 << order):
-        s = apply_diff_byte(state, word_index, byte_index, basis, subset)
-        s = gimli_permutation(s, rounds)
-        b = (s[word_index] >> (8*byte_index)) & 0xFF
-        # XOR according to alternating-sum formula
-        if bin(subset).count("1") % 2 == 1:
-            result ^= b
-    return result
+    if not 0 <= max_order <= len(basis):
+        raise ValueError(f"max_order must be between 0 and {len(basis)}, got {max_order}")
+    n = 1 << max_order
+    subsets = np.arange(n, dtype=np.uint32)
+    delta = np.zeros(n, dtype=np.uint32)
+    for i in range(max_order):
+        delta[((subsets >> i) & 1).astype(bool)] ^= np.uint32(basis[i])
+
+    # One state per [word, byte, subset]
+    s = np.tile(np.array(state, dtype=np.uint32), (12, 4, n, 1))
+    for word_index in range(12):
+        for byte_index in range(4):
+            s[word_index, byte_index, :, word_index] ^= delta << (8*byte_index)
+    s = gimli_permutation(s, rounds)
+
+    words = np.arange(12)
+    # s[w, :, :, w] is word w of the states that varied a byte of word w
+    b = (s[words, :, :, words] >> (8*np.arange(4, dtype=np.uint32))[:, None]) & 0xFF
+    # XOR according to alternating-sum formula
+    b[..., np.bitwise_count(subsets) % 2 == 0] = 0
+    prefix = np.bitwise_xor.accumulate(b, axis=-1)
+    return prefix[..., (1 << np.arange(1, max_order + 1)) - 1]
 
 # ---------------------------
 # Test derivatives for all bytes
@@ -68,13 +146,13 @@ def test_all_bytes():
     state = [0x00000001] + [0]*11
     print("Initial state:", [f"{x:08X}" for x in state])
 
+    derivatives = all_byte_derivatives(state, 4, rounds=4)
     for word_index in range(12):
         for byte_index in range(4):
             print(f"\n--- Word {word_index}, Byte {byte_index} ---")
             for order in range(1, 5):
-                d = higher_order_derivative_byte(state, word_index, byte_index, order, rounds=4)
+                d = int(derivatives[word_index, byte_index, order - 1])
                 print(f"{order}-order derivative: 0x{d:02X}")
 
 if __name__ == "__main__":
     test_all_bytes()
-
@@ -3,7 +3,20 @@
 # Compute higher-order derivatives for the Gimli-style permutation
 # (Uses the same permutation implementation as before)
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+
+import numpy as np
+
 ROUND_CONSTANT = 0x9e
+# (r % 4, round constant or 0) for every round number r; the constants are
+# 8-bit, so round numbers stop at 255
+ROUND_SCHEDULE = tuple((r % 4, ROUND_CONSTANT ^ r if r % 4 == 0 else 0) for r in range(256))
+# Plaintexts encrypted per NumPy pass in compute_higher_order_derivative;
+# must be a power of two (see _derivative_block)
+BATCH_SIZE = 1 << 16
 
 # ---------- low-level helpers (rotations, sbox, swaps) ----------
 def rotl8(x, n):
@@ -12,74 +25,129 @@ def rotl8(x, n):
 def rotr8(x, n):
     return ((x >> n) | (x << (8 - n))) & 0xff
 
-SBOX = [7, 4, 6, 1, 0, 5, 2, 3]
-INV_SBOX = [SBOX.index(i) for i in range(8)]
+# bytes: indexing returns the entry straight from the raw buffer
+SBOX = bytes([7, 4, 6, 1, 0, 5, 2, 3])
+INV_SBOX = bytes(sorted(range(len(SBOX)), key=SBOX.__getitem__))
+
+# ---------- packed planes ----------
+# Each plane is one int, column i in byte i, so every helper below works on
+# all four columns at once (32-bit SWAR) instead of looping over lanes.
+def pack_plane(p):
+    return p[0] | (p[1] << 8) | (p[2] << 16) | (p[3] << 24)
+
+def unpack_plane(w):
+    return [w & 0xff, (w >> 8) & 0xff, (w >> 16) & 0xff, w >> 24]
+
+def pack_state(state):
+    """([x0..x3], [y0..y3], [z0..z3]) byte lists -> packed (x, y, z)."""
+    return tuple(pack_plane(p) for p in state)
+
+def unpack_state(state):
+    return tuple(unpack_plane(w) for w in state)
 
 def sbox_lanes(x, y, z):
-    new_x, new_y, new_z = [], [], []
-    for xi, yi, zi in zip(x, y, z):
-        sx = sy = sz = 0
-        for bit in range(8):
-            a = (xi >> bit) & 1
-            b = (yi >> bit) & 1
-            c = (zi >> bit) & 1
-            val = SBOX[(a << 2) | (b << 1) | c]
-            sx |= ((val >> 2) & 1) << bit
-            sy |= ((val >> 1) & 1) << bit
-            sz |= (val & 1) << bit
-        new_x.append(sx)
-        new_y.append(sy)
-        new_z.append(sz)
+    # Bitsliced SBOX: bit i of (x, y, z) is one 3-bit input (a, b, c),
+    # so a handful of word-wide Boolean ops evaluates every bit at once.
+    new_x = ((x & ~z) | (y & z)) ^ 0xffffffff
+    new_y = ((x | z) ^ (x & y)) ^ 0xffffffff
+    new_z = ((x | y) ^ z) ^ 0xffffffff
     return new_x, new_y, new_z
 
 def rotate_planes(x, y, z):
-    return ([rotl8(w, 6) for w in x],
-            [rotl8(w, 2) for w in y],
+    return (((x << 6) & 0xc0c0c0c0) | ((x >> 2) & 0x3f3f3f3f),   # rotl8(., 6) per byte
+            ((y << 2) & 0xfcfcfcfc) | ((y >> 6) & 0x03030303),   # rotl8(., 2) per byte
             z)
 
 def small_swap(x, y, z):
-    x = [x[1], x[0], x[3], x[2]]
-    y = [y[1], y[0], y[3], y[2]]
-    z = [z[1], z[0], z[3], z[2]]
+    x = ((x & 0xff00ff00) >> 8) | ((x & 0x00ff00ff) << 8)
+    y = ((y & 0xff00ff00) >> 8) | ((y & 0x00ff00ff) << 8)
+    z = ((z & 0xff00ff00) >> 8) | ((z & 0x00ff00ff) << 8)
     return x, y, z
 
 def big_swap(x, y, z):
-    x = [x[2], x[3], x[0], x[1]]
-    y = [y[2], y[3], y[0], y[1]]
-    z = [z[2], z[3], z[0], z[1]]
+    x = (x >> 16) | ((x & 0xffff) << 16)
+    y = (y >> 16) | ((y & 0xffff) << 16)
+    z = (z >> 16) | ((z & 0xffff) << 16)
     return x, y, z
 
+def round_schedule(round_number):
+    """ROUND_SCHEDULE entry for round_number, which must lie in 0..255."""
+    if not 0 <= round_number < len(ROUND_SCHEDULE):
+        raise ValueError(f"round number {round_number} outside 0..{len(ROUND_SCHEDULE) - 1}")
+    return ROUND_SCHEDULE[round_number]
+
 def add_round_constant(x, round_number):
-    x = x[:]
-    if round_number % 4 == 0:
-        x[0] ^= (ROUND_CONSTANT ^ round_number)
+    const = round_schedule(round_number)[1]
+    if const:
+        x = x ^ const
     return x
 
 # ---------- permutation (encryption) ----------
 def gimli_encrypt(state, rounds=tuple(range(1, 13))):
-    # rounds is an iterable of round numbers (example: range(1, N+1))
+    # rounds is an iterable of round numbers (example: range(1, N+1));
+    # state is packed (see pack_state). The planes may also be uint32
+    # arrays, encrypting one state per element.
     x, y, z = state
     for r in rounds:
+        swap, const = round_schedule(r)
         x, y, z = rotate_planes(x, y, z)
         x, y, z = sbox_lanes(x, y, z)
-        if r % 4 == 0:
+        if swap == 0:
             x, y, z = small_swap(x, y, z)
-        elif r % 4 == 2:
+            x = x ^ const
+        elif swap == 2:
             x, y, z = big_swap(x, y, z)
-        x = add_round_constant(x, r)
     return x, y, z
 
+# ---------- specialized permutation ----------
+# Source of one round with the helpers above inlined; the swap and round
+# constant lines are only emitted for the rounds that have them.
+_ROUND_SRC = """
+    a = ((x << 6) & 0xc0c0c0c0) | ((x >> 2) & 0x3f3f3f3f)
+    b = ((y << 2) & 0xfcfcfcfc) | ((y >> 6) & 0x03030303)
+    x = ((a & ~z) | (b & z)) ^ 0xffffffff
+    y = ((a | z) ^ (a & b)) ^ 0xffffffff
+    z = ((a | b) ^ z) ^ 0xffffffff"""
+_SMALL_SWAP_SRC = """
+    x = ((x & 0xff00ff00) >> 8) | ((x & 0x00ff00ff) << 8)
+    y = ((y & 0xff00ff00) >> 8) | ((y & 0x00ff00ff) << 8)
+    z = ((z & 0xff00ff00) >> 8) | ((z & 0x00ff00ff) << 8)
+    x = x ^ {const}"""
+_BIG_SWAP_SRC = """
+    x = (x >> 16) | ((x & 0xffff) << 16)
+    y = (y >> 16) | ((y & 0xffff) << 16)
+    z = (z >> 16) | ((z & 0xffff) << 16)"""
+
+@lru_cache(maxsize=None)
+def _build_encrypt(rounds):
+    src = ["def encrypt(state):", "    x, y, z = state"]
+    for r in rounds:
+        swap, const = round_schedule(r)
+        src.append(_ROUND_SRC)
+        if swap == 0:
+            src.append(_SMALL_SWAP_SRC.format(const=const))
+        elif swap == 2:
+            src.append(_BIG_SWAP_SRC)
+    src.append("    return x, y, z")
+    namespace = {}
+    exec("\n".join(src), namespace)
+    return namespace["encrypt"]
+
+def build_encrypt(rounds):
+    """
+    Return encrypt(state) equivalent to gimli_encrypt(state, rounds), with
+    the rounds unrolled and every r % 4 branch resolved up front. Built
+    once per round schedule.
+    """
+    return _build_encrypt(tuple(rounds))
+
 # ---------- state helpers ----------
 def zero_state():
-    return ([0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0])
+    return (0, 0, 0)
 
 def xor_states(s1, s2):
-    # XOR two states (tuple of three lists)
-    return (
-        [a ^ b for a, b in zip(s1[0], s2[0])],
-        [a ^ b for a, b in zip(s1[1], s2[1])],
-        [a ^ b for a, b in zip(s1[2], s2[2])],
-    )
+    # XOR two packed states
+    return (s1[0] ^ s2[0], s1[1] ^ s2[1], s1[2] ^ s2[2])
 
 def make_single_byte_diff(plane, col, mask):
     """
@@ -87,13 +155,41 @@ def make_single_byte_diff(plane, col, mask):
     is XORed with `mask` (0..255).
     """
     pidx = {'x': 0, 'y': 1, 'z': 2}[plane]
-    s = ([0,0,0,0], [0,0,0,0], [0,0,0,0])
-    s_list = list(s)
-    s_list[pidx][col] = mask
-    return tuple(s_list)
+    s = [0, 0, 0]
+    s[pidx] = mask << (8 * col)
+    return tuple(s)
 
 # ---------- higher-order derivative function ----------
-def compute_higher_order_derivative(base_state, diffs, rounds_iterable, target_positions):
+def subset_deltas(diffs):
+    """
+    XOR of the diffs over every subset, as a (3, 2^t) uint32 array: column
+    `mask` holds the packed planes of XOR of diffs[i] for each bit i set in mask.
+    Built by doubling, so each entry costs one XOR.
+    """
+    deltas = np.zeros((3, 1 << len(diffs)), dtype=np.uint32)
+    for i, d in enumerate(diffs):
+        n = 1 << i
+        deltas[:, n:2 * n] = deltas[:, :n] ^ np.array(d, dtype=np.uint32)[:, None]
+    return deltas
+
+def _derivative_block(base_state, diffs, rounds, target_positions, start, stop):
+    """XOR of the target bytes over subsets start..stop-1, as a list."""
+    # Blocks are power-of-two sized and aligned, so the low bits of the mask
+    # index a delta table and the high bits pick one fixed offset per block.
+    low = (stop - start).bit_length() - 1
+    high = list(base_state)
+    for i in range(low, len(diffs)):
+        if (start >> i) & 1:
+            high = xor_states(high, diffs[i])
+    deltas = subset_deltas(diffs[:low])
+    ct = gimli_encrypt(tuple(deltas[p] ^ np.uint32(high[p]) for p in range(3)), rounds=rounds)
+    # XOR commutes with byte extraction: reduce each plane once, then pick
+    # the target bytes out of the three summed words
+    summed = [int(np.bitwise_xor.reduce(plane)) for plane in ct]
+    return [(summed[{'x':0,'y':1,'z':2}[p]] >> (8 * c)) & 0xff for (p, c) in target_positions]
+
+def compute_higher_order_derivative(base_state, diffs, rounds_iterable, target_positions,
+                                    workers=None):
     """
     Compute t-th order derivative Δ_{d1,...,dt} f at base_state, where
     `diffs` is a list of t difference states (each a state tuple).
@@ -102,7 +198,8 @@ def compute_higher_order_derivative(base_state, diffs, rounds_iterable, target_p
       plane in {'x','y','z'}, col in 0..3
 
     Returns a dict mapping (plane,col) -> XOR-value (0..255).
-    This performs 2^t evaluations.
+    This performs 2^t evaluations, in blocks of BATCH_SIZE spread over
+    `workers` processes (default: one per CPU) when there is more than one.
     """
     t = len(diffs)
     if t >= 25:
@@ -110,20 +207,42 @@ def compute_higher_order_derivative(base_state, diffs, rounds_iterable, target_p
         raise ValueError("Too many diffs (2^t explodes). Keep t smaller.")
 
     accum = {(p, c): 0 for (p, c) in target_positions}
+    rounds = tuple(rounds_iterable)
+
+    # The permutation never mixes columns: the S-box and rotations act within
+    # a byte and the swaps only move whole columns (XOR-ing the column index
+    # with 1 or 2). Output columns that no diff reaches hold the same byte
+    # for all 2^t subsets, which XOR to zero for t >= 1 -- only targets in
+    # reached columns need any encryptions.
+    route = 0
+    for r in rounds:
+        swap = round_schedule(r)[0]
+        if swap == 0:
+            route ^= 1
+        elif swap == 2:
+            route ^= 2
+    reached = {c ^ route for d in diffs for w in d for c in range(4) if (w >> (8 * c)) & 0xff}
+    if t:
+        target_positions = [(p, c) for (p, c) in target_positions if c in reached]
+        if not target_positions:
+            return accum
 
-    # Iterate over all 2^t subsets
-    for mask in range(1 << t):
-        # build delta sum for this subset
-        delta = zero_state()
-        for i in range(t):
-            if (mask >> i) & 1:
-                delta = xor_states(delta, diffs[i])
-        pt = xor_states(base_state, delta)
-        ct = gimli_encrypt(pt, rounds=rounds_iterable)
-        # collect target bytes
-        for (p, c) in target_positions:
-            pidx = {'x':0,'y':1,'z':2}[p]
-            accum[(p, c)] ^= ct[pidx][c]
+    # Encrypt the 2^t subsets in blocks of uint32 arrays; XOR is associative,
+    # so the blocks can run in any order and on any process.
+    starts = range(0, 1 << t, BATCH_SIZE)
+    stops = [min(start + BATCH_SIZE, 1 << t) for start in starts]
+    args = (repeat(base_state), repeat(diffs), repeat(rounds), repeat(target_positions),
+            starts, stops)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(starts) > 1:
+        with ProcessPoolExecutor(min(workers, len(starts))) as pool:
+            blocks = list(pool.map(_derivative_block, *args))
+    else:
+        blocks = map(_derivative_block, *args)
+    for block in blocks:
+        for target, value in zip(target_positions, block):
+            accum[target] ^= value
     return accum
 
 # ---------- helpers to build basis diffs ----------
@@ -1,13 +1,15 @@
-import itertools
+from higher_order import build_encrypt, pack_state
+
+PLANE = {'x': 0, 'y': 1, 'z': 2}
 
 # ---------------------------------------------------------
-#  Your cipher here (replace with your own implementation)
+#  Cipher: the packed toy permutation from higher_order.py
 # ---------------------------------------------------------
 def gimli_encrypt(state, rounds=4):
-    # state = (x[4], y[4], z[4])
-    # Put your cipher here. This is a placeholder identity map.
-    x, y, z = state
-    return x[:], y[:], z[:]
+    # state = packed (x, y, z), one int per plane (see pack_state)
+    if rounds == 0:
+        return state
+    return build_encrypt(range(1, rounds + 1))(state)
 
 
 # ---------------------------------------------------------
@@ -17,19 +19,6 @@ def byte_basis_vectors():
     return [1 << i for i in range(8)]   # [1,2,4,8,16,32,64,128]
 
 
-# ---------------------------------------------------------
-#  Apply a difference to state
-# ---------------------------------------------------------
-def apply_diff(state, diffs):
-    (x, y, z) = state
-    x = x[:] ; y = y[:] ; z = z[:]
-    for (layer, idx, val) in diffs:
-        if layer == 'x': x[idx] ^= val
-        if layer == 'y': y[idx] ^= val
-        if layer == 'z': z[idx] ^= val
-    return (x, y, z)
-
-
 # ---------------------------------------------------------
 #  Evaluate t‑th order derivative from basis vectors
 # ---------------------------------------------------------
@@ -37,26 +26,21 @@ def higher_order_derivative(state, target, diffs, rounds=4):
     layer, pos = target
     xor_sum = 0
 
-    # For all subsets of the difference vectors
-    for r in range(len(diffs) + 1):
-        for subset in itertools.combinations(diffs, r):
-            st = apply_diff(state, subset)
-            x, y, z = gimli_encrypt(st, rounds)
-
-            # sign = parity of subset
-            if (r % 2) == 1:
-                sign = 1
-            else:
-                sign = 0
-
-            val = {
-                'x': x[pos],
-                'y': y[pos],
-                'z': z[pos],
-            }[layer]
-
-            if sign == 1:
-                xor_sum ^= val
+    # For all subsets of the difference vectors, in Gray-code order: one
+    # packed working state has a single diff toggled in place per step
+    # (the lowest set bit of i), and the subset parity flips with it.
+    st = list(pack_state(state))
+    sign = 0
+    for i in range(1 << len(diffs)):
+        if i:
+            d_layer, idx, val = diffs[(i & -i).bit_length() - 1]
+            st[PLANE[d_layer]] ^= val << (8 * idx)
+            sign ^= 1
+
+        # Only odd subsets contribute to the sum
+        if sign == 1:
+            ct = gimli_encrypt(st, rounds)
+            xor_sum ^= (ct[PLANE[layer]] >> (8 * pos)) & 0xff
 
     return xor_sum
 
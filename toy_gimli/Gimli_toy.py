@@ -5,7 +5,16 @@
 # with 3-bit S-box [7, 4, 6, 1, 0, 5, 2, 3]
 # =============================================
 
+import numpy as np
+
+try:
+    import gimli_ext
+except ImportError:
+    gimli_ext = None
+
 ROUND_CONSTANT = 0x9e
+# Round constants of the 24-round schedule (only rounds r % 4 == 0 have one)
+ROUND_XOR = {r: ROUND_CONSTANT ^ r for r in range(25) if r % 4 == 0}
 
 def rotl8(x, n):
     return ((x << n) | (x >> (8 - n))) & 0xff
@@ -16,41 +25,28 @@ def rotr8(x, n):
 # ---------------------------
 # 3-bit S-box and its inverse
 # ---------------------------
-SBOX = [7, 4, 6, 1, 0, 5, 2, 3]
-INV_SBOX = [SBOX.index(i) for i in range(8)]
+SBOX = (7, 4, 6, 1, 0, 5, 2, 3)
+INV_SBOX = (4, 3, 6, 7, 1, 5, 2, 0)
 
 def sbox_lanes(x, y, z):
-    new_x, new_y, new_z = [], [], []
-    for xi, yi, zi in zip(x, y, z):
-        sx = sy = sz = 0
-        for bit in range(8):
-            a = (xi >> bit) & 1
-            b = (yi >> bit) & 1
-            c = (zi >> bit) & 1
-            val = SBOX[(a << 2) | (b << 1) | c]
-            sx |= ((val >> 2) & 1) << bit
-            sy |= ((val >> 1) & 1) << bit
-            sz |= (val & 1) << bit
-        new_x.append(sx)
-        new_y.append(sy)
-        new_z.append(sz)
+    # Bitsliced SBOX: bit i of (x, y, z) is one 3-bit input (a, b, c),
+    # so a handful of word-wide Boolean ops evaluates every bit at once.
+    new_x, new_y, new_z = [0] * 4, [0] * 4, [0] * 4
+    for i in range(4):
+        a, b, c = x[i], y[i], z[i]
+        new_x[i] = ((a & ~c) | (b & c)) ^ 0xff
+        new_y[i] = ((a | c) ^ (a & b)) ^ 0xff
+        new_z[i] = ((a | b) ^ c) ^ 0xff
     return new_x, new_y, new_z
 
 def inv_sbox_lanes(x, y, z):
-    new_x, new_y, new_z = [], [], []
-    for xi, yi, zi in zip(x, y, z):
-        sx = sy = sz = 0
-        for bit in range(8):
-            a = (xi >> bit) & 1
-            b = (yi >> bit) & 1
-            c = (zi >> bit) & 1
-            val = INV_SBOX[(a << 2) | (b << 1) | c]
-            sx |= ((val >> 2) & 1) << bit
-            sy |= ((val >> 1) & 1) << bit
-            sz |= (val & 1) << bit
-        new_x.append(sx)
-        new_y.append(sy)
-        new_z.append(sz)
+    # Bitsliced INV_SBOX, same lane layout as sbox_lanes.
+    new_x, new_y, new_z = [0] * 4, [0] * 4, [0] * 4
+    for i in range(4):
+        a, b, c = x[i], y[i], z[i]
+        new_x[i] = (a ^ (c & ~b)) ^ 0xff
+        new_y[i] = (b | c) ^ (a & c)
+        new_z[i] = (a | c) ^ (a & b)
     return new_x, new_y, new_z
 
 # ---------------------------
@@ -81,9 +77,11 @@ def big_swap(x, y, z):
     return x, y, z
 
 def add_round_constant(x, round_number):
-    x = x[:]
-    if round_number % 4 == 0:
-        x[0] ^= (ROUND_CONSTANT ^ round_number)
+    # In place: callers always hand in a plane they own.
+    if round_number in ROUND_XOR:
+        x[0] ^= ROUND_XOR[round_number]
+    elif round_number % 4 == 0:
+        x[0] ^= ROUND_CONSTANT ^ round_number
     return x
 
 def remove_round_constant(x, round_number):
@@ -99,10 +97,56 @@ def print_state(x, y, z, label="State"):
     print("y:", " ".join(format(w, "08b") for w in y))
     print("z:", " ".join(format(w, "08b") for w in z))
 
+# ---------------------------
+# Packed rounds (32-bit SWAR)
+# ---------------------------
+# Each plane is packed little-endian into one int, column i in byte i, so
+# the S-box runs on all four columns at once and the swaps become byte
+# shuffles within the word.
+def pack_plane(p):
+    return p[0] | (p[1] << 8) | (p[2] << 16) | (p[3] << 24)
+
+def unpack_plane(w):
+    return [w & 0xff, (w >> 8) & 0xff, (w >> 16) & 0xff, w >> 24]
+
+def permute_packed(x, y, z, rounds):
+    """Runs `rounds` on the packed planes x, y, z and returns them."""
+    for r in rounds:
+        a = ((x << 6) & 0xc0c0c0c0) | ((x >> 2) & 0x3f3f3f3f)   # rotl8(., 6) per byte
+        b = ((y << 2) & 0xfcfcfcfc) | ((y >> 6) & 0x03030303)   # rotl8(., 2) per byte
+        x = ((a & ~z) | (b & z)) ^ 0xffffffff
+        y = ((a | z) ^ (a & b)) ^ 0xffffffff
+        z = ((a | b) ^ z) ^ 0xffffffff
+        if r % 4 == 0:
+            x = ((x & 0xff00ff00) >> 8) | ((x & 0x00ff00ff) << 8)
+            y = ((y & 0xff00ff00) >> 8) | ((y & 0x00ff00ff) << 8)
+            z = ((z & 0xff00ff00) >> 8) | ((z & 0x00ff00ff) << 8)
+            x ^= ROUND_XOR[r] if r in ROUND_XOR else ROUND_CONSTANT ^ r
+        elif r % 4 == 2:
+            x = (x >> 16) | ((x & 0xffff) << 16)
+            y = (y >> 16) | ((y & 0xffff) << 16)
+            z = (z >> 16) | ((z & 0xffff) << 16)
+    return x, y, z
+
+ROUNDS_12 = tuple(range(12, 0, -1))
+
+def gimli_permute(state, rounds=ROUNDS_12):
+    """Permutation without intermediate printing; used by gimli_encrypt."""
+    x, y, z = state
+    rounds = tuple(rounds)
+    if gimli_ext is not None and gimli_ext.AVAILABLE and rounds == tuple(range(len(rounds), 0, -1)):
+        s = gimli_ext.permute8(x + y + z, len(rounds))
+        return list(s[0:4]), list(s[4:8]), list(s[8:12])
+    x, y, z = permute_packed(pack_plane(x), pack_plane(y), pack_plane(z), rounds)
+    return unpack_plane(x), unpack_plane(y), unpack_plane(z)
+
 # ---------------------------
 # Encryption (12 rounds)
 # ---------------------------
 def gimli_encrypt(state, rounds=tuple(range(12, 0, -1)), verbose=False):
+    if not verbose:
+        return gimli_permute(state, rounds)
+
     x, y, z = state
     if verbose:
         print_state(x, y, z, "Initial state")
@@ -143,7 +187,7 @@ def gimli_encrypt(state, rounds=tuple(range(12, 0, -1)), verbose=False):
 # Decryption (inverse)
 # ---------------------------
 def gimli_decrypt(state, rounds=tuple(range(12, 0, -1)), verbose=False):
-    x, y, z = state
+    x, y, z = state[0][:], state[1][:], state[2][:]
     if verbose:
         print_state(x, y, z, "Initial ciphertext state")
 
@@ -179,6 +223,46 @@ def gimli_decrypt(state, rounds=tuple(range(12, 0, -1)), verbose=False):
         print_state(x, y, z, "Plaintext recovered")
     return x, y, z
 
+# ---------------------------
+# Batched permutation (NumPy)
+# ---------------------------
+# Same round function as above, applied to N independent states at once.
+# Planes are uint8 arrays of shape (N, 4), so rotations wrap for free.
+def rotate_planes_batch(x, y, z):
+    return (x << 6) | (x >> 2), (y << 2) | (y >> 6), z
+
+def sbox_lanes_batch(x, y, z):
+    return ~((x & ~z) | (y & z)), ~((x | z) ^ (x & y)), ~((x | y) ^ z)
+
+def small_swap_batch(x, y, z):
+    """Swaps columns 0 and 1, and columns 2 and 3."""
+    idx = [1, 0, 3, 2]
+    return x[:, idx], y[:, idx], z[:, idx]
+
+def big_swap_batch(x, y, z):
+    """Swaps columns 0 and 2, and columns 1 and 3."""
+    idx = [2, 3, 0, 1]
+    return x[:, idx], y[:, idx], z[:, idx]
+
+def gimli_encrypt_batch(states, rounds=tuple(range(12, 0, -1))):
+    """
+    Encrypts a batch of states given as an array of shape (N, 3, 4)
+    (plane, column) and returns the ciphertexts in the same layout.
+    """
+    states = np.asarray(states, dtype=np.uint8)
+    x, y, z = states[:, 0], states[:, 1], states[:, 2]
+
+    for r in rounds:
+        x, y, z = rotate_planes_batch(x, y, z)
+        x, y, z = sbox_lanes_batch(x, y, z)
+        if r % 4 == 0:
+            x, y, z = small_swap_batch(x, y, z)
+            x[:, 0] ^= ROUND_XOR[r] if r in ROUND_XOR else ROUND_CONSTANT ^ r
+        elif r % 4 == 2:
+            x, y, z = big_swap_batch(x, y, z)
+
+    return np.stack((x, y, z), axis=1)
+
 # ---------------------------
 # Example usage
 # ---------------------------
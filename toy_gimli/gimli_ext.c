@@ -0,0 +1,48 @@
+// C version of the 8-bit toy Gimli-style permutation, loaded from Python via
+// ctypes (see gimli_ext.py). Build with `make ext`.
+//
+// State layout is [x0..x3, y0..y3, z0..z3]. The 3-bit S-box
+// [7, 4, 6, 1, 0, 5, 2, 3] is evaluated bitsliced on whole lanes.
+
+#include <stdint.h>
+
+#define ROTL8(x,b)  ((uint8_t)(((x) << (b)) | ((x) >> (8 - (b)))))
+
+#define SWAP(s,i,j) do { t = (s)[i]; (s)[i] = (s)[j]; (s)[j] = t; } while (0)
+
+// 8-bit toy (Gimli_toy.py): rounds R, R-1, ..., 1
+void gimli_permute8(uint8_t state[12], int rounds)
+{
+    uint8_t a, b, c, t;
+    for(int r = rounds; r >= 1; r--)
+    {
+        for(int col = 0; col < 4; col++)
+        {
+            a = ROTL8(state[col], 6);
+            b = ROTL8(state[col+4], 2);
+            c = state[col+8];
+
+            state[col]   = (uint8_t)~((a & ~c) | (b & c));
+            state[col+4] = (uint8_t)~((a | c) ^ (a & b));
+            state[col+8] = (uint8_t)~((a | b) ^ c);
+        }
+
+        if((r & 3) == 0)
+        {
+            for(int p = 0; p < 12; p += 4)
+            {
+                SWAP(state, p, p+1);
+                SWAP(state, p+2, p+3);
+            }
+            state[0] ^= (uint8_t)(0x9e ^ r);
+        }
+        else if((r & 3) == 2)
+        {
+            for(int p = 0; p < 12; p += 4)
+            {
+                SWAP(state, p, p+2);
+                SWAP(state, p+1, p+3);
+            }
+        }
+    }
+}
@@ -0,0 +1,29 @@
+"""
+ctypes bindings for gimli_ext.c.
+
+Build the shared library with `make ext`; when it is missing AVAILABLE is
+False and callers fall back to the pure-Python permutation.
+"""
+
+import ctypes
+import os
+
+LIB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "libgimli_ext.so")
+
+try:
+    _lib = ctypes.CDLL(LIB_PATH)
+except OSError:
+    _lib = None
+
+AVAILABLE = _lib is not None
+
+if AVAILABLE:
+    _lib.gimli_permute8.argtypes = (ctypes.POINTER(ctypes.c_uint8), ctypes.c_int)
+    _lib.gimli_permute8.restype = None
+
+
+def permute8(state_bytes, rounds):
+    """8-bit toy permutation, rounds R..1, on 12 state bytes [x0..x3, y0..y3, z0..z3]."""
+    buf = (ctypes.c_uint8 * 12).from_buffer_copy(bytes(state_bytes))
+    _lib.gimli_permute8(buf, rounds)
+    return bytes(buf)